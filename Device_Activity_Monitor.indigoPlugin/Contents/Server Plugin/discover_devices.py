@@ -21,6 +21,7 @@
 #    - Edit labels, add # to disable, remove # to enable
 # 5. Reload the plugin: Plugins > Sensor Monitor > Reload Plugin
 # 6. Full device list is in device_discovery.json if you need to find anything
+#    (device_discovery.ndjson has the same devices, one JSON object per line)
 
 import indigo
 import json
@@ -49,6 +50,16 @@ _LOG_DIR     = os.path.join(_INDIGO_BASE, "Logs", "SensorMonitor")
 DISCOVERY_OUTPUT_PATH = os.path.join(_LOG_DIR, "device_discovery.json")
 CONFIG_OUTPUT_PATH    = os.path.join(_LOG_DIR, "sensor_monitor_config.json")
 
+# JSON Lines copy of all_devices next to the discovery file: one device per
+# line, so tools can stream it a device at a time instead of parsing the
+# whole inventory.
+DISCOVERY_NDJSON_PATH = os.path.splitext(DISCOVERY_OUTPUT_PATH)[0] + ".ndjson"
+
+# Write buffer for the two output files.  json.dump() and the config writer
+# both emit many small strings; a 1 MB buffer lets them collapse into a
+# handful of write() syscalls instead of one per fragment.
+_WRITE_BUFFER_SIZE = 1 << 20
+
 # Plugin IDs whose devices are excluded from discovery entirely.
 # Virtual devices can mimic any state, so they must be skipped.
 # Alexa plugin creates a named mirror for every exposed Indigo device, so a
@@ -61,7 +72,7 @@ EXCLUDED_PLUGIN_IDS   = {
 }
 
 # State names that strongly suggest a contact/door/window sensor
-CONTACT_STATE_NAMES   = {"contact", "doorSensor", "windowSensor"}
+CONTACT_STATE_NAMES   = frozenset({"contact", "doorSensor", "windowSensor"})
 
 # Keywords in device name that suggest a contact/door/window sensor
 CONTACT_NAME_KEYWORDS = [
@@ -69,7 +80,7 @@ CONTACT_NAME_KEYWORDS = [
 ]
 
 # State names that strongly suggest a motion/occupancy/presence sensor
-MOTION_STATE_NAMES    = {"occupancy", "pirDetection", "presence", "motion", "motionDetected"}
+MOTION_STATE_NAMES    = frozenset({"occupancy", "pirDetection", "presence", "motion", "motionDetected"})
 
 # Keywords in device name that suggest a motion/occupancy/presence sensor
 MOTION_NAME_KEYWORDS  = [
@@ -95,6 +106,24 @@ NAME_EXCLUSION_KEYWORDS = {
     "light", "lights",                  # Lighting devices (e.g. Shelly strip lights)
 }
 
+# Case-insensitive alternations of the keyword lists above.  One compiled
+# regex search runs the whole keyword scan in C and needs no per-device
+# dev.name.lower() copy.
+_CONTACT_NAME_RE   = re.compile("|".join(map(re.escape, CONTACT_NAME_KEYWORDS)),
+                                re.IGNORECASE)
+_MOTION_NAME_RE    = re.compile("|".join(map(re.escape, MOTION_NAME_KEYWORDS)),
+                                re.IGNORECASE)
+_NAME_EXCLUSION_RE = re.compile("|".join(map(re.escape, NAME_EXCLUSION_KEYWORDS)),
+                                re.IGNORECASE)
+
+# Two compiled passes over the config text remove what strict JSON rejects:
+# whole-line # comments first, then trailing commas before ] or } (which
+# commenting out a last entry leaves behind). Folding both into one
+# pattern needs a comment-skipping lookahead on every comma in the file,
+# which measured about 3x slower than these two plain substitutions.
+_COMMENT_LINE_RE   = re.compile(r"(?m)^[ \t]*#.*$")
+_TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+
 # ======================================
 # HELPERS
 # ======================================
@@ -103,23 +132,56 @@ def log(msg):
     indigo.server.log(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
 
 
-def get_folder_name(dev):
+def get_folder_name(dev, folders=None):
+    """Return the name of dev's folder, or "(root)".
+
+    Most devices sit at the root (folderId 0) and return before any folder
+    lookup.  Pass folders (indigo.devices.folders) when calling in a loop.
+    """
+    folder_id = dev.folderId
+    if not folder_id:
+        return "(root)"
     try:
-        if dev.folderId and dev.folderId in indigo.devices.folders:
-            return indigo.devices.folders[dev.folderId].name
+        if folders is None:
+            folders = indigo.devices.folders
+        if folder_id in folders:
+            return folders[folder_id].name
     except Exception:
         pass
     return "(root)"
 
 
 def get_states(dev):
-    """Return dict of all state names and their current values."""
+    """Return dict of all state names and their current values.
+
+    dict() copies a mapping (anything with keys()) in one C-level pass; the
+    per-key comprehension is only kept for state objects that are iterable
+    but not a mapping.
+    """
     try:
-        return {k: dev.states[k] for k in dev.states}
+        states = dev.states
+        if hasattr(states, "keys"):
+            return dict(states)
+        return {k: states[k] for k in states}
     except Exception:
         return {}
 
 
+# onState support per device class.  Indigo devices of one class either all
+# have onState or none do, so hasattr() - which raises and swallows an
+# AttributeError on a miss - only needs to run once per class.
+_has_onstate_cache = {}
+
+
+def has_onstate(dev):
+    """Return True if dev's class exposes onState (probed once per class)."""
+    cls    = type(dev)
+    has_on = _has_onstate_cache.get(cls)
+    if has_on is None:
+        has_on = _has_onstate_cache[cls] = hasattr(dev, "onState")
+    return has_on
+
+
 def is_excluded_plugin(dev):
     """Return True if the device belongs to a plugin that should be skipped."""
     return getattr(dev, "pluginId", "") in EXCLUDED_PLUGIN_IDS
@@ -133,8 +195,7 @@ def is_name_excluded(dev):
     AND its name contains an exclusion keyword, it is hidden from the config
     entirely — even from the commented-out 'Other devices' section.
     """
-    name_lower = dev.name.lower()
-    return any(kw in name_lower for kw in NAME_EXCLUSION_KEYWORDS)
+    return _NAME_EXCLUSION_RE.search(dev.name) is not None
 
 
 def is_contact_candidate(dev, states):
@@ -154,16 +215,18 @@ def is_contact_candidate(dev, states):
     'Front Door Temperature' has 'door' in its name but 'temperature' vetoes it.
     State-name matching always wins regardless of the device name.
     """
-    state_match = bool(CONTACT_STATE_NAMES & set(states.keys()))
+    # states is already a dict - probe it directly rather than building a
+    # set of its keys just to intersect with three names.
+    state_match = not CONTACT_STATE_NAMES.isdisjoint(states)
     if state_match:
         return True
-    if not hasattr(dev, "onState"):
+    if not has_onstate(dev):
         return False
-    name_lower = dev.name.lower()
-    if any(kw in name_lower for kw in NAME_EXCLUSION_KEYWORDS):
+    name = dev.name
+    if _NAME_EXCLUSION_RE.search(name):
         return False
-    has_contact_kw = any(kw in name_lower for kw in CONTACT_NAME_KEYWORDS)
-    has_motion_kw  = any(kw in name_lower for kw in MOTION_NAME_KEYWORDS)
+    has_contact_kw = _CONTACT_NAME_RE.search(name) is not None
+    has_motion_kw  = _MOTION_NAME_RE.search(name) is not None
     return has_contact_kw and not has_motion_kw
 
 
@@ -181,15 +244,15 @@ def is_motion_candidate(dev, states):
     NAME_EXCLUSION_KEYWORDS veto name-based classification (state-name
     matching is never affected).
     """
-    state_match = bool(MOTION_STATE_NAMES & set(states.keys()))
+    state_match = not MOTION_STATE_NAMES.isdisjoint(states)
     if state_match:
         return True
-    if not hasattr(dev, "onState"):
+    if not has_onstate(dev):
         return False
-    name_lower = dev.name.lower()
-    if any(kw in name_lower for kw in NAME_EXCLUSION_KEYWORDS):
+    name = dev.name
+    if _NAME_EXCLUSION_RE.search(name):
         return False
-    return any(kw in name_lower for kw in MOTION_NAME_KEYWORDS)
+    return _MOTION_NAME_RE.search(name) is not None
 
 
 def motion_state_list(states):
@@ -199,16 +262,26 @@ def motion_state_list(states):
     return found if found else ["onState"]
 
 
-def make_motion_entry(dev, state_name, commented=False):
-    """Return a JSON config line for a motion sensor device and state."""
-    entry = (
-        f'    {{"id": {dev.id}, "name": "{dev.name}", '
-        f'"state": "{state_name}", "label": "{dev.name}", '
-        f'"on_text": "ON", "off_text": "OFF"}}'
+def format_entry(dev, state, on_text, off_text, commented=False):
+    """Return one device entry as an indented JSON object line.
+
+    json.dumps escapes quotes and backslashes in device names (which the old
+    f-string formatting did not) and builds the line in C.  ensure_ascii is
+    off so non-ASCII names stay readable in the hand-edited config file.
+    """
+    entry = "    " + json.dumps(
+        {"id": dev.id, "name": dev.name, "state": state, "label": dev.name,
+         "on_text": on_text, "off_text": off_text},
+        ensure_ascii=False,
     )
     return f"# {entry}" if commented else entry
 
 
+def make_motion_entry(dev, state_name, commented=False):
+    """Return a JSON config line for a motion sensor device and state."""
+    return format_entry(dev, state_name, "ON", "OFF", commented)
+
+
 def make_config_entry(dev, states, commented=False):
     """Return a JSON object string for sensor_monitor_config.json.
 
@@ -225,12 +298,7 @@ def make_config_entry(dev, states, commented=False):
         on_text  = "OPEN"
         off_text = "CLOSED"
 
-    entry = (
-        f'    {{"id": {dev.id}, "name": "{dev.name}", '
-        f'"state": "{state}", "label": "{dev.name}", '
-        f'"on_text": "{on_text}", "off_text": "{off_text}"}}'
-    )
-    return f"# {entry}" if commented else entry
+    return format_entry(dev, state, on_text, off_text, commented)
 
 
 def suggest_py_entry(dev, states):
@@ -261,9 +329,9 @@ excluded_ids = set()
 if os.path.exists(CONFIG_OUTPUT_PATH):
     try:
         with open(CONFIG_OUTPUT_PATH, "r", encoding="utf-8") as f:
-            existing_lines = f.readlines()
-        active_lines = [l for l in existing_lines if not l.lstrip().startswith("#")]
-        json_str     = re.sub(r",(\s*[}\]])", r"\1", "".join(active_lines))
+            raw = f.read()
+        json_str     = _COMMENT_LINE_RE.sub("", raw)
+        json_str     = _TRAILING_COMMA_RE.sub(r"\1", json_str)
         existing_cfg = json.loads(json_str)
         excluded_ids = set(int(x) for x in existing_cfg.get("excluded_ids", []))
         if excluded_ids:
@@ -272,8 +340,13 @@ if os.path.exists(CONFIG_OUTPUT_PATH):
         excluded_ids = set()
 
 all_devices     = []
-contact_sensors = []
-motion_sensors  = []
+
+# Device objects captured during the scan, keyed by ID.  Each
+# indigo.devices[id] lookup is a round-trip to the Indigo server, so the
+# config-writing loops below reuse these instead of re-fetching.
+dev_by_id       = {}
+
+device_folders  = indigo.devices.folders
 
 for dev in indigo.devices:
     if is_excluded_plugin(dev):
@@ -290,7 +363,7 @@ for dev in indigo.devices:
     if not (is_contact or is_motion) and is_name_excluded(dev):
         continue
 
-    folder      = get_folder_name(dev)
+    folder      = get_folder_name(dev, device_folders)
     sensor_type = ("contact" if is_contact
                    else "motion" if is_motion
                    else None)
@@ -301,7 +374,7 @@ for dev in indigo.devices:
         "folder":      folder,
         "enabled":     dev.enabled,
         "plugin_id":   getattr(dev, "pluginId", ""),
-        "on_state":    dev.onState if hasattr(dev, "onState") else None,
+        "on_state":    dev.onState if has_onstate(dev) else None,
         "states":      states,
         "sensor_type": sensor_type,
         "suggested_device_monitor_entry": (
@@ -310,15 +383,19 @@ for dev in indigo.devices:
     }
 
     all_devices.append(entry)
-    if is_contact:
-        contact_sensors.append(entry)
-    elif is_motion:
-        motion_sensors.append(entry)
+    dev_by_id[dev.id] = dev
 
-# Sort alphabetically by name
-all_devices.sort(    key=lambda x: x["name"].lower())
-contact_sensors.sort(key=lambda x: x["name"].lower())
-motion_sensors.sort( key=lambda x: x["name"].lower())
+# Sort alphabetically by name once, then split out the sensor lists - a
+# stable partition of a sorted list is itself sorted, so the subsets need
+# no sort of their own.
+all_devices.sort(key=lambda x: x["name"].lower())
+contact_sensors = []
+motion_sensors  = []
+for d in all_devices:
+    if d["sensor_type"] == "contact":
+        contact_sensors.append(d)
+    elif d["sensor_type"] == "motion":
+        motion_sensors.append(d)
 
 # Separate active (to be monitored) from excluded (commented-out by user choice)
 active_contacts   = [d for d in contact_sensors if d["id"] not in excluded_ids]
@@ -344,15 +421,40 @@ discovery_output = {
     "all_devices":     all_devices,
 }
 
+# Create each output directory once, up front.  The two paths share a
+# directory by default, but the config file must not rely on the discovery
+# write having created it.
+for out_dir in {os.path.dirname(DISCOVERY_OUTPUT_PATH),
+                os.path.dirname(DISCOVERY_NDJSON_PATH),
+                os.path.dirname(CONFIG_OUTPUT_PATH)}:
+    try:
+        os.makedirs(out_dir, exist_ok=True)
+    except Exception as e:
+        log(f"ERROR creating output directory {out_dir}: {e}")
+        raise
+
 try:
-    os.makedirs(os.path.dirname(DISCOVERY_OUTPUT_PATH), exist_ok=True)
-    with open(DISCOVERY_OUTPUT_PATH, "w", encoding="utf-8") as f:
+    with open(DISCOVERY_OUTPUT_PATH, "w", encoding="utf-8",
+              buffering=_WRITE_BUFFER_SIZE) as f:
+        # Indented for people searching it by hand (see step 6 above);
+        # device_discovery.ndjson is the compact copy for tools.
         json.dump(discovery_output, f, indent=2, default=str)
     log(f"Full device list saved to: {DISCOVERY_OUTPUT_PATH}")
 except Exception as e:
     log(f"ERROR saving device_discovery.json: {e}")
     raise
 
+try:
+    with open(DISCOVERY_NDJSON_PATH, "w", encoding="utf-8",
+              buffering=_WRITE_BUFFER_SIZE) as f:
+        for d in all_devices:
+            f.write(json.dumps(d, separators=(",", ":"), default=str))
+            f.write("\n")
+    log(f"Device list (JSON Lines) saved to: {DISCOVERY_NDJSON_PATH}")
+except Exception as e:
+    log(f"ERROR saving device_discovery.ndjson: {e}")
+    raise
+
 # ======================================
 # BUILD sensor_monitor_config.json
 #
@@ -366,95 +468,97 @@ except Exception as e:
 #   The device will remain commented-out on every future run.
 # ======================================
 
-config_lines = []
-config_lines.append("{")
-config_lines.append(f'  "_generated": "{datetime.now().isoformat()}",')
-config_lines.append(f'  "_total_scanned": {len(all_devices)},')
-config_lines.append('  "_usage": [')
-config_lines.append('    "Lines starting with # are ignored (disabled entries).",')
-config_lines.append('    "Remove # from a line to enable that device or variable.",')
-config_lines.append('    "Add # to the start of a line to disable it.",')
-config_lines.append('    "Change label to customise text in the Indigo event log.",')
-config_lines.append('    "Reload plugin after saving: Plugins > Sensor Monitor > Reload Plugin"')
-config_lines.append('  ],')
-excl_list = ", ".join(str(x) for x in sorted(excluded_ids))
-config_lines.append(f'  "excluded_ids": [{excl_list}],')
-config_lines.append('  "_exclude_hint": "Add a device ID to excluded_ids to '
-                    'keep it commented-out after every re-discovery run.",')
-config_lines.append("")
-
-# --- devices section ---
-config_lines.append('  "devices": [')
-config_lines.append("")
-
-if active_contacts:
-    config_lines.append("    # --- Contact / Door / Window sensors (active) ---")
-    for d in active_contacts:
-        dev_obj = indigo.devices[d["id"]]
-        config_lines.append(
-            make_config_entry(dev_obj, d["states"], commented=False) + ","
-        )
-    config_lines.append("")
-
-if active_motions:
-    config_lines.append("    # --- Motion / Occupancy / Presence sensors (active) ---")
-    for d in active_motions:
-        dev_obj    = indigo.devices[d["id"]]
-        mot_states = motion_state_list(d["states"])
-        for state_name in mot_states:
-            config_lines.append(
-                make_motion_entry(dev_obj, state_name, commented=False) + ","
-            )
-    config_lines.append("")
-
-if excluded_contacts or excluded_motions:
-    config_lines.append(
-        "    # --- Excluded sensors "
-        "(add ID to 'excluded_ids' above to keep excluded on re-discovery) ---"
-    )
-    for d in excluded_contacts:
-        dev_obj = indigo.devices[d["id"]]
-        config_lines.append(
-            make_config_entry(dev_obj, d["states"], commented=True) + ","
-        )
-    for d in excluded_motions:
-        dev_obj    = indigo.devices[d["id"]]
-        mot_states = motion_state_list(d["states"])
-        for state_name in mot_states:
-            config_lines.append(
-                make_motion_entry(dev_obj, state_name, commented=True) + ","
-            )
-    config_lines.append("")
-
-# All other devices commented out for reference
-other = [d for d in all_devices if d["sensor_type"] is None]
-if other:
-    config_lines.append("    # --- Other devices (not contact/motion - remove # to enable) ---")
-    for d in other:
-        dev_obj = indigo.devices[d["id"]]
-        config_lines.append(
-            make_config_entry(dev_obj, d["states"], commented=True) + ","
-        )
-    config_lines.append("")
-
-config_lines.append('  ],')
-config_lines.append("")
-
-# --- variables section ---
-config_lines.append('  "variables": [')
-config_lines.append("")
-config_lines.append("    # Add variables to monitor here.  Format:")
-config_lines.append('    # {"id": 123456789, "name": "Variable_Name", "label": "Display Label"}')
-config_lines.append("")
-config_lines.append('  ]')
-config_lines.append("")
-config_lines.append("}")
-
-config_text = "\n".join(config_lines) + "\n"
-
+# Lines are written straight through the buffered file as they are built;
+# no list of lines or joined string is held in memory.
 try:
-    with open(CONFIG_OUTPUT_PATH, "w", encoding="utf-8") as f:
-        f.write(config_text)
+    with open(CONFIG_OUTPUT_PATH, "w", encoding="utf-8",
+              buffering=_WRITE_BUFFER_SIZE) as f:
+        def emit(line):
+            f.write(line)
+            f.write("\n")
+
+        emit("{")
+        emit(f'  "_generated": "{datetime.now().isoformat()}",')
+        emit(f'  "_total_scanned": {len(all_devices)},')
+        emit('  "_usage": [')
+        emit('    "Lines starting with # are ignored (disabled entries).",')
+        emit('    "Remove # from a line to enable that device or variable.",')
+        emit('    "Add # to the start of a line to disable it.",')
+        emit('    "Change label to customise text in the Indigo event log.",')
+        emit('    "Reload plugin after saving: Plugins > Sensor Monitor > Reload Plugin"')
+        emit('  ],')
+        excl_list = ", ".join(str(x) for x in sorted(excluded_ids))
+        emit(f'  "excluded_ids": [{excl_list}],')
+        emit('  "_exclude_hint": "Add a device ID to excluded_ids to '
+             'keep it commented-out after every re-discovery run.",')
+        emit("")
+
+        # --- devices section ---
+        emit('  "devices": [')
+        emit("")
+
+        if active_contacts:
+            emit("    # --- Contact / Door / Window sensors (active) ---")
+            for d in active_contacts:
+                dev_obj = dev_by_id[d["id"]]
+                emit(
+                    make_config_entry(dev_obj, d["states"], commented=False) + ","
+                )
+            emit("")
+
+        if active_motions:
+            emit("    # --- Motion / Occupancy / Presence sensors (active) ---")
+            for d in active_motions:
+                dev_obj    = dev_by_id[d["id"]]
+                mot_states = motion_state_list(d["states"])
+                for state_name in mot_states:
+                    emit(
+                        make_motion_entry(dev_obj, state_name, commented=False) + ","
+                    )
+            emit("")
+
+        if excluded_contacts or excluded_motions:
+            emit(
+                "    # --- Excluded sensors "
+                "(add ID to 'excluded_ids' above to keep excluded on re-discovery) ---"
+            )
+            for d in excluded_contacts:
+                dev_obj = dev_by_id[d["id"]]
+                emit(
+                    make_config_entry(dev_obj, d["states"], commented=True) + ","
+                )
+            for d in excluded_motions:
+                dev_obj    = dev_by_id[d["id"]]
+                mot_states = motion_state_list(d["states"])
+                for state_name in mot_states:
+                    emit(
+                        make_motion_entry(dev_obj, state_name, commented=True) + ","
+                    )
+            emit("")
+
+        # All other devices commented out for reference
+        other = [d for d in all_devices if d["sensor_type"] is None]
+        if other:
+            emit("    # --- Other devices (not contact/motion - remove # to enable) ---")
+            for d in other:
+                dev_obj = dev_by_id[d["id"]]
+                emit(
+                    make_config_entry(dev_obj, d["states"], commented=True) + ","
+                )
+            emit("")
+
+        emit('  ],')
+        emit("")
+
+        # --- variables section ---
+        emit('  "variables": [')
+        emit("")
+        emit("    # Add variables to monitor here.  Format:")
+        emit('    # {"id": 123456789, "name": "Variable_Name", "label": "Display Label"}')
+        emit("")
+        emit('  ]')
+        emit("")
+        emit("}")
     log(f"Plugin config saved to:  {CONFIG_OUTPUT_PATH}")
 except Exception as e:
     log(f"ERROR saving sensor_monitor_config.json: {e}")
@@ -126,12 +126,18 @@ try:
 except ImportError:
     pass
 
+import collections
+import functools
 import json
+import logging
 import os
 import platform
 import re
 import sys as _sys
+import time
 from datetime import datetime
+from operator import itemgetter
+from types import MappingProxyType
 
 _sys.path.insert(0, os.getcwd())
 try:
@@ -139,6 +145,15 @@ try:
 except ImportError:
     log_startup_banner = None
 
+# orjson parses the config several times faster than the stdlib when it is
+# installed; it is optional and json.loads is used otherwise. Both take the
+# cleaned str and raise a ValueError subclass on bad input.
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # ======================================
 # CONFIG FILE PATH
 #
@@ -178,17 +193,88 @@ except Exception:
 CONFIG_PATH           = os.path.join(_PREFS_DIR, "device_activity_monitor_config.json")
 DISCOVERY_OUTPUT_PATH = os.path.join(_PREFS_DIR, "device_discovery.json")
 
+# Discovery output is written to "<path>.tmp" through a buffer this size and
+# then os.replace()d over the real file, so a failed write never leaves a
+# truncated config for the next _load_config() to reject.
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# Seconds between event-log flushes while runConcurrentThread is running.
+# Lines logged by the device/variable callbacks within one interval reach
+# Indigo as a single indigo.server.log call.
+LOG_FLUSH_INTERVAL = 0.1
+
+# Two compiled passes over the config text remove what strict JSON rejects:
+# whole-line # comments first, then trailing commas before ] or } (which
+# commenting out a last entry leaves behind). Folding both into one
+# pattern needs a comment-skipping lookahead on every comma in the file,
+# which measured about 3x slower than these two plain substitutions.
+# A JSON5 parser (json5 / pyjson5) is not a drop-in replacement: JSON5
+# accepts trailing commas but only // and /* */ comments, not the # lines
+# this file format uses, so the text would still need these passes.
+_COMMENT_LINE_RE   = re.compile(r"(?m)^[ \t]*#.*$")
+_TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+
+# [whole epoch second, its "HH:MM:SS"] for _ts(): bursts of events within
+# one second only append the milliseconds.
+_ts_second = [None, ""]
+
+
+def _ts(clock=time.time, localtime=time.localtime, cached=_ts_second):
+    """Return the current local time as HH:MM:SS.mmm for event log lines.
+
+    Works from time.time() with no datetime object, and the HH:MM:SS part
+    is formatted only when the second changes - this runs at event rate.
+    """
+    t   = clock()
+    sec = int(t)
+    if sec != cached[0]:
+        lt = localtime(sec)
+        cached[1] = f"{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}"
+        cached[0] = sec
+    return f"{cached[1]}.{int((t - sec) * 1000):03d}"
+
+
+def _file_fingerprint(path):
+    """Return (st_mtime_ns, st_size) for path - changes whenever it is saved."""
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _discard_tmp(path):
+    """Remove a half-written "<path>.tmp" after a failed discovery write."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass  # never created, or already gone
+
+
+def _intern(value):
+    """sys.intern() config strings; other JSON values pass through as-is."""
+    return _sys.intern(value) if type(value) is str else value
+
+
+def _value_tuple(value):
+    """Normalise a config on_value/off_value (scalar or list) to a tuple.
+
+    None passes through unchanged so callers can still tell "not set".
+    """
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    return (value,)
+
 # ======================================
 # DISCOVERY CONSTANTS
 #
 # Used by the menu-driven discovery methods.
 # ======================================
 
-_CONTACT_STATE_NAMES   = {"contact", "doorSensor", "windowSensor"}
-_CONTACT_NAME_KEYWORDS = ["contact", "door", "window", "entry", "gate", "patio", "garage"]
+_CONTACT_STATE_NAMES   = frozenset({"contact", "doorSensor", "windowSensor"})
+_CONTACT_NAME_KEYWORDS = ("contact", "door", "window", "entry", "gate", "patio", "garage")
 
-_MOTION_STATE_NAMES    = {"occupancy", "pirDetection", "presence", "motion", "motionDetected"}
-_MOTION_NAME_KEYWORDS  = ["motion", "pir", "presence", "occupancy", "mmwave", "radar"]
+_MOTION_STATE_NAMES    = frozenset({"occupancy", "pirDetection", "presence", "motion", "motionDetected"})
+_MOTION_NAME_KEYWORDS  = ("motion", "pir", "presence", "occupancy", "mmwave", "radar")
 
 # Preferred motion-state order — pick the single best one when multiple exist.
 # Multi-state Z2M presence sensors typically report ALL of: motion, occupancy,
@@ -200,8 +286,45 @@ _MOTION_STATE_PRIORITY = ("occupancy", "presence", "motion",
 # Zigbee2MQTT-Bridge plugin ID — owner-props on these devices include
 # authoritative has_contact / has_occupancy / has_presence / has_pir flags.
 _Z2M_BRIDGE_PLUGIN_ID  = "com.clives.indigoplugin.z2mbridge"
-_Z2M_CONTACT_TYPE_IDS   = {"z2mContactSensor"}
-_Z2M_OCCUPANCY_TYPE_IDS = {"z2mOccupancySensor"}
+_Z2M_CONTACT_TYPE_IDS   = frozenset({"z2mContactSensor"})
+_Z2M_OCCUPANCY_TYPE_IDS = frozenset({"z2mOccupancySensor"})
+
+# Per-device discovery result cached by _disc_cached(), so running the
+# discovery menus back to back only re-classifies devices that changed.
+DiscoveryEntry = collections.namedtuple(
+    "DiscoveryEntry", "folder states is_contact is_motion")
+
+# onState support per device class.  Indigo devices of one class either all
+# have onState or none do (ThermostatDevice never does), so hasattr() - which
+# raises and swallows an AttributeError on a miss - runs once per class.
+_has_onstate_cache = {}
+
+
+def _has_onstate(dev):
+    """Return True if dev's class exposes onState (probed once per class)."""
+    cls    = type(dev)
+    has_on = _has_onstate_cache.get(cls)
+    if has_on is None:
+        has_on = _has_onstate_cache[cls] = hasattr(dev, "onState")
+    return has_on
+
+
+@functools.lru_cache(maxsize=1024)
+def _entry_line(dev_id, name, state, on_text, off_text, commented):
+    """Return one config entry line; see Plugin._format_entry_line().
+
+    A pure function of its arguments, so repeat discovery runs reuse the
+    encoded line. The device name is part of the key - a renamed device
+    simply misses - and maxsize bounds what deleted devices leave behind.
+    json.dumps escapes quotes and backslashes in device names; ensure_ascii
+    is off so non-ASCII names stay readable in the hand-edited file.
+    """
+    line = "    " + json.dumps(
+        {"id": dev_id, "name": name, "state": state, "label": name,
+         "on_text": on_text, "off_text": off_text},
+        ensure_ascii=False,
+    )
+    return f"# {line}" if commented else line
 
 # ======================================
 # NAME EXCLUSION KEYWORDS
@@ -222,7 +345,7 @@ _Z2M_OCCUPANCY_TYPE_IDS = {"z2mOccupancySensor"}
 # Add keywords here to block new false-positive categories.
 # ======================================
 
-_NAME_EXCLUSION_KEYWORDS = {
+_NAME_EXCLUSION_KEYWORDS = frozenset({
     "temperature", "temp",              # Temperature sensors
     "luminance", "lux", "illuminance",  # Light-level sensors
     "power",                            # Power monitoring (watts)
@@ -235,7 +358,17 @@ _NAME_EXCLUSION_KEYWORDS = {
     "control",                          # Control devices (locks, dimmers, etc.)
     "virtual",                          # Virtual devices not in plugin exclusion set
     "light", "lights",                  # Lighting devices (e.g. Shelly strip lights)
-}
+})
+
+# Case-insensitive alternations of the keyword lists above, so each name
+# check is one compiled regex search instead of a Python-level any() loop
+# over a lowercased copy of the name.
+_CONTACT_NAME_RE   = re.compile("|".join(map(re.escape, _CONTACT_NAME_KEYWORDS)),
+                                re.IGNORECASE)
+_MOTION_NAME_RE    = re.compile("|".join(map(re.escape, _MOTION_NAME_KEYWORDS)),
+                                re.IGNORECASE)
+_NAME_EXCLUSION_RE = re.compile("|".join(map(re.escape, _NAME_EXCLUSION_KEYWORDS)),
+                                re.IGNORECASE)
 
 # ======================================
 # EXCLUDED PLUGIN IDs
@@ -252,10 +385,10 @@ _NAME_EXCLUSION_KEYWORDS = {
 # device_discovery.json — each entry includes the plugin_id field.
 # ======================================
 
-_EXCLUDED_PLUGIN_IDS = {
+_EXCLUDED_PLUGIN_IDS = frozenset({
     "com.perceptiveautomation.indigoplugin.virtualdevices",  # Virtual Devices (built-in)
     "com.indigodomo.indigoplugin.alexa",                     # Alexa (mirrors real devices by name)
-}
+})
 
 # ======================================
 # DEVICE MONITOR CONFIGURATION  (FALLBACK)
@@ -334,6 +467,15 @@ VARIABLE_MONITOR = {
     241032502: {"label": "Lux Level"},
 }
 
+# Read-only snapshots of the two fallback dicts, built once at import.
+# _load_config() gives each plugin a shallow copy of the top level (so adding
+# or removing IDs never touches these or the dicts above) while the entries
+# themselves are shared read-only views rather than copied on every fallback.
+_FALLBACK_DEVICE_MONITOR   = {k: tuple(MappingProxyType(dict(s)) for s in v)
+                              for k, v in DEVICE_MONITOR.items()}
+_FALLBACK_VARIABLE_MONITOR = {k: MappingProxyType(dict(v))
+                              for k, v in VARIABLE_MONITOR.items()}
+
 
 class Plugin(indigo.PluginBase):
 
@@ -348,9 +490,23 @@ class Plugin(indigo.PluginBase):
         # Group-change machinery. damGroup devices are the only source of
         # truth (v1.8.1+). _rebuild_group_index() recomputes group_members
         # from device_groups whenever it changes.
-        self.device_groups   = {}    # {damGroup_dev_id: {"name", "members"}}
-        self.group_members   = set() # union — fast O(1) test in deviceUpdated
-        self.event_triggers  = {}    # {trigger.id: indigo.trigger}
+        self.device_groups   = {}          # {damGroup_dev_id: {"name", "members"}}
+        self.group_members   = frozenset() # union — fast O(1) test in deviceUpdated
+        self.event_triggers  = {}          # {trigger.id: indigo.trigger}
+
+        # Event-log lines queued by _server_log() while runConcurrentThread
+        # is flushing them in batches. Until the thread starts (and in tests)
+        # _server_log() writes straight through to indigo.server.log.
+        self._log_buf      = collections.deque()
+        self._log_batching = False
+
+        # Last config file loaded by _load_config() and its fingerprint -
+        # menuReloadConfig skips the reload while the file is unchanged.
+        self._config_path        = None
+        self._config_fingerprint = None
+
+        # {dev.id: (lastChanged, DiscoveryEntry)} — see _disc_cached().
+        self._discovery_cache = {}
 
         self._load_config()
 
@@ -363,25 +519,81 @@ class Plugin(indigo.PluginBase):
         indigo.devices.subscribeToChanges()
         indigo.variables.subscribeToChanges()
         self.logger.info(
-            f"Device Activity Monitor {self.pluginVersion} started - "
-            f"monitoring {len(self.device_monitor)} devices, "
-            f"{len(self.variable_monitor)} variables"
+            "Device Activity Monitor %s started - monitoring %d devices, %d variables",
+            self.pluginVersion, len(self.device_monitor), len(self.variable_monitor)
         )
         self._validate_monitored_devices()
         self._validate_monitored_variables()
 
     def shutdown(self):
+        self._flush_log()  # anything queued after runConcurrentThread's last drain
         self.logger.info("Device Activity Monitor stopped")
 
+    def runConcurrentThread(self):
+        """Flush queued event-log lines every LOG_FLUSH_INTERVAL seconds.
+
+        Each indigo.server.log call is a round-trip to the Indigo server; a
+        burst of sensor changes is sent as one multi-line entry instead.
+        """
+        self._log_batching = True
+        try:
+            while True:
+                self._flush_log()
+                self.sleep(LOG_FLUSH_INTERVAL)
+        except self.StopThread:
+            pass
+        finally:
+            self._log_batching = False
+            self._flush_log()
+
+    # ======================================
+    # EVENT LOG OUTPUT
+    # ======================================
+
+    def _server_log(self, msg):
+        """Write msg to the Indigo event log, batched when the flusher runs."""
+        if self._log_batching:
+            self._log_buf.append(msg)
+            # The flusher may have stopped (and done its final drain) between
+            # the check and the append - send the line ourselves if so.
+            if not self._log_batching:
+                self._flush_log()
+        else:
+            indigo.server.log(msg)
+
+    def _flush_log(self):
+        """Send every queued line to the event log in one call.
+
+        deque.append/popleft are atomic, so callbacks can keep queueing while
+        this drains without a lock; a second drain running at the same time
+        (see _server_log) just takes whichever lines it pops first.
+        """
+        buf = self._log_buf
+        if not buf:
+            return
+        popleft = buf.popleft
+        lines   = []
+        try:
+            for _ in range(len(buf)):
+                lines.append(popleft())
+        except IndexError:
+            pass  # emptied by a concurrent drain
+        if lines:
+            indigo.server.log("\n".join(lines))
+
     # ======================================
     # DEVICE CHANGE CALLBACK
     # ======================================
 
     def deviceUpdated(self, origDev, newDev):
-        super().deviceUpdated(origDev, newDev)
+        if self._discovery_cache:
+            self._discovery_cache.pop(newDev.id, None)
 
-        # Loop-guard: ignore changes the plugin itself caused.
+        # Loop-guard: ignore changes the plugin itself caused. PluginBase only
+        # acts on the plugin's own devices (restarting comm when their props
+        # change), so super() is skipped for every other device in Indigo.
         if newDev.pluginId == self.pluginId:
+            super().deviceUpdated(origDev, newDev)
             return
 
         # --- Group-change triggers (v1.7.0, direction filter v1.7.2) ---
@@ -400,87 +612,125 @@ class Plugin(indigo.PluginBase):
                 if states_changed or onstate_flip:
                     self._fire_group_triggers(origDev, newDev)
             except Exception as exc:
-                self.logger.error(f"[Device Activity Monitor] group-trigger error: {exc}")
+                self.logger.error("[Device Activity Monitor] group-trigger error: %s", exc)
 
-        if newDev.id not in self.device_monitor:
+        # One lookup both tests membership and fetches the pre-baked
+        # state tuples built by _rebuild_monitor_index().
+        entries = self._monitor.get(newDev.id)
+        if not entries:
             return
 
-        timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
+        # The timestamp is formatted by the first branch that logs and then
+        # shared by every line of this update: most updates change nothing
+        # that is monitored and never need one.
+        timestamp = None
 
         # --- Name change detection ---
         if origDev.name != newDev.name:
-            indigo.server.log(
+            timestamp = _ts()
+            self._server_log(
                 f"[{timestamp}] [Device Activity Monitor] Device renamed: "
                 f"'{origDev.name}' -> '{newDev.name}' (ID: {newDev.id})"
             )
 
-        # --- State change logging ---
-        for config in self.device_monitor[newDev.id]:
-            state_name = config["state"]
+        # Updates that change neither the states dict nor onState (e.g. only
+        # lastChanged or a rename) cannot touch a monitored state - skip the
+        # per-entry diff. Each dev.states read goes through Indigo's
+        # accessor, so both are fetched once and shared with the loop below.
+        old_states = origDev.states
+        new_states = newDev.states
+        if (new_states == old_states
+                and getattr(newDev, "onState", None) == getattr(origDev, "onState", None)):
+            return
+        old_get = old_states.get
+        new_get = new_states.get
 
-            try:
-                if state_name == "onState":
-                    old_val = getattr(origDev, "onState", None)
-                    new_val = getattr(newDev,  "onState", None)
-                else:
-                    old_val = origDev.states.get(state_name)
-                    new_val = newDev.states.get(state_name)
-            except Exception as e:
-                self.logger.error(
-                    f"[{timestamp}] Error reading '{state_name}' "
-                    f"for {newDev.name}: {e}"
-                )
-                continue
+        # --- State change logging ---
+        # Lines for every state that changed in this update are collected and
+        # sent as one _server_log() call - one round-trip to the Indigo
+        # server even for multi-state sensors when the flusher isn't running.
+        lines = []
+        for (state_name, is_onstate, label,
+             on_text, off_text, on_value, off_value) in entries:
+
+            # Neither read can raise: getattr() has a default and a missing
+            # state key is None from .get(), so there is no try/except here -
+            # anything unexpected surfaces with a full traceback.
+            if is_onstate:
+                old_val = getattr(origDev, "onState", None)
+                new_val = getattr(newDev,  "onState", None)
+            else:
+                old_val = old_get(state_name)
+                new_val = new_get(state_name)
 
             if old_val == new_val:
                 continue  # State did not change - skip
 
-            on_text   = config.get("on_text",  "ON")
-            off_text  = config.get("off_text", "OFF")
-            on_value  = config.get("on_value")
-            off_value = config.get("off_value")
-
             # When on_value/off_value are configured, use explicit value
             # matching — needed for string-typed states like presenceEvent
             # (Aqara RTCZCGQ11LM) whose values are "enter" / "leave" rather
             # than booleans. Otherwise fall back to truthy/falsy comparison.
+            # The index stores both as tuples of accepted values.
             if on_value is not None or off_value is not None:
-                def _matches(val, target):
-                    if isinstance(target, (list, tuple)):
-                        return val in target
-                    return val == target
-                if on_value is not None and _matches(new_val, on_value):
+                if on_value is not None and new_val in on_value:
                     state_text = on_text
-                elif off_value is not None and _matches(new_val, off_value):
+                elif off_value is not None and new_val in off_value:
                     state_text = off_text
                 else:
                     continue  # New value matches neither — don't log
             else:
                 state_text = on_text if new_val else off_text
-            label = config["label"]
+
+            # Throttle: drop a line that repeats the text last logged for
+            # this state within log_throttle seconds (flapping mmWave
+            # sensors whose raw value changes but whose ON/OFF text doesn't).
+            if self.log_throttle:
+                key  = (newDev.id, state_name)
+                now  = time.monotonic()
+                last = self._last_logged.get(key)
+                if (last is not None and last[0] == state_text
+                        and now - last[1] < self.log_throttle):
+                    continue
+                self._last_logged[key] = (state_text, now)
+
+            if timestamp is None:
+                timestamp = _ts()
 
             # Suppress the label if it is identical to the device name to
             # avoid e.g. "Side Passage Motion Side Passage Motion OFF"
             if label == newDev.name:
-                indigo.server.log(f"[{timestamp}] {newDev.name} {state_text}")
+                lines.append(f"[{timestamp}] {newDev.name} {state_text}")
             else:
-                indigo.server.log(f"[{timestamp}] {newDev.name} {label} {state_text}")
+                lines.append(f"[{timestamp}] {newDev.name} {label} {state_text}")
+
+        if lines:
+            self._server_log("\n".join(lines))
 
     # ======================================
     # DEVICE DELETED CALLBACK
     # ======================================
 
     def deviceDeleted(self, dev):
-        super().deviceDeleted(dev)
+        self._discovery_cache.pop(dev.id, None)
+
+        # Own devices: PluginBase stops comm, and a deleted damGroup leaves
+        # the group index. Other devices skip super(), as in deviceUpdated().
+        if dev.pluginId == self.pluginId:
+            super().deviceDeleted(dev)
+            if dev.deviceTypeId == "damGroup":
+                self.device_groups.pop(dev.id, None)
+                self._rebuild_group_index()
+            return
 
-        if dev.id not in self.device_monitor:
+        if dev.id not in self._monitored_dev_ids:
             return
 
-        timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
+        # Queued state lines happened first - keep the event log in order
+        self._flush_log()
         self.logger.warning(
-            f"[{timestamp}] [Device Activity Monitor] WARNING - Monitored device deleted: "
-            f"'{dev.name}' (ID: {dev.id}) - "
-            f"remove from config file or DEVICE_MONITOR in plugin.py"
+            "[%s] [Device Activity Monitor] WARNING - Monitored device deleted: "
+            "'%s' (ID: %s) - remove from config file or DEVICE_MONITOR in plugin.py",
+            _ts(), dev.name, dev.id
         )
 
     # ======================================
@@ -488,16 +738,18 @@ class Plugin(indigo.PluginBase):
     # ======================================
 
     def variableUpdated(self, origVar, newVar):
-        super().variableUpdated(origVar, newVar)
-
-        if newVar.id not in self.variable_monitor:
+        if newVar.id not in self._monitored_var_ids:
             return
 
-        timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
+        super().variableUpdated(origVar, newVar)
+
+        # Formatted on first use and shared by both lines, as in deviceUpdated()
+        timestamp = None
 
         # --- Name change detection ---
         if origVar.name != newVar.name:
-            indigo.server.log(
+            timestamp = _ts()
+            self._server_log(
                 f"[{timestamp}] [Device Activity Monitor] Variable renamed: "
                 f"'{origVar.name}' -> '{newVar.name}' (ID: {newVar.id})"
             )
@@ -506,11 +758,12 @@ class Plugin(indigo.PluginBase):
         if origVar.value == newVar.value:
             return
 
-        config = self.variable_monitor[newVar.id]
-        label  = config.get("label", newVar.name)
+        label = self._var_labels[newVar.id]
+        if label is None:
+            label = newVar.name
 
-        indigo.server.log(
-            f"[{timestamp}] {label}: {origVar.value} -> {newVar.value}"
+        self._server_log(
+            f"[{timestamp or _ts()}] {label}: {origVar.value} -> {newVar.value}"
         )
 
     # ======================================
@@ -518,16 +771,16 @@ class Plugin(indigo.PluginBase):
     # ======================================
 
     def variableDeleted(self, var):
-        super().variableDeleted(var)
-
-        if var.id not in self.variable_monitor:
+        if var.id not in self._monitored_var_ids:
             return
 
-        timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
+        super().variableDeleted(var)
+
+        self._flush_log()  # queued state lines first, as in deviceDeleted()
         self.logger.warning(
-            f"[{timestamp}] [Device Activity Monitor] WARNING - Monitored variable deleted: "
-            f"'{var.name}' (ID: {var.id}) - "
-            f"remove from config file or VARIABLE_MONITOR in plugin.py"
+            "[%s] [Device Activity Monitor] WARNING - Monitored variable deleted: "
+            "'%s' (ID: %s) - remove from config file or VARIABLE_MONITOR in plugin.py",
+            _ts(), var.name, var.id
         )
 
     # ======================================
@@ -620,12 +873,15 @@ class Plugin(indigo.PluginBase):
             self._update_smgroup_diagnostics(trigger, newDev, direction)
 
             indigo.trigger.execute(trigger)
-            ts = datetime.now().strftime('%H:%M:%S.%f')[:-3]
-            self.logger.debug(
-                f"[{ts}] [Device Activity Monitor] Fired group trigger "
-                f"'{trigger.name}' (fireOn={fire_on}, direction={direction}) "
-                f"for {newDev.name}"
-            )
+            # Debug is off by default - don't pay for the timestamp unless
+            # the line will actually be emitted.
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(
+                    "[%s] [Device Activity Monitor] Fired group trigger "
+                    "'%s' (fireOn=%s, direction=%s) for %s",
+                    _ts(),
+                    trigger.name, fire_on, direction, newDev.name
+                )
 
     def _update_smgroup_diagnostics(self, trigger, dev, direction):
         """Update lastFiringDevice/Time/Direction states on the damGroup
@@ -668,12 +924,6 @@ class Plugin(indigo.PluginBase):
         self.device_groups.pop(dev.id, None)
         self._rebuild_group_index()
 
-    def deviceDeleted(self, dev):
-        super().deviceDeleted(dev)
-        if dev.deviceTypeId == "damGroup":
-            self.device_groups.pop(dev.id, None)
-            self._rebuild_group_index()
-
     def _refresh_smgroup_states(self, dev, members):
         """Set the damGroup device's display state lines."""
         try:
@@ -705,10 +955,11 @@ class Plugin(indigo.PluginBase):
 
     def _rebuild_group_index(self):
         """Recompute group_members (union of all damGroup devices' members)."""
-        all_members = set()
-        for info in self.device_groups.values():
-            all_members |= info.get("members", set())
-        self.group_members = all_members
+        # Frozen like _monitored_dev_ids: deviceUpdated() tests it for every
+        # device change in Indigo, and it is only ever replaced, never edited.
+        self.group_members = frozenset().union(
+            *(info.get("members", ()) for info in self.device_groups.values())
+        )
 
     def getFolderList(self, filter="", valuesDict=None, typeId="", targetId=0):
         """Folder dropdown for the damGroup ConfigUI. Returns (id, label) tuples."""
@@ -860,10 +1111,10 @@ class Plugin(indigo.PluginBase):
         if os.path.exists(CONFIG_PATH):
             try:
                 with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-                    existing_lines = f.readlines()
-                active_lines = [l for l in existing_lines if not l.lstrip().startswith("#")]
-                json_str     = re.sub(r",(\s*[}\]])", r"\1", "".join(active_lines))
-                existing_cfg = json.loads(json_str)
+                    raw = f.read()
+                json_str     = _COMMENT_LINE_RE.sub("", raw)
+                json_str     = _TRAILING_COMMA_RE.sub(r"\1", json_str)
+                existing_cfg = _json_loads(json_str)
                 excluded_ids = set(int(x) for x in existing_cfg.get("excluded_ids", []))
                 if excluded_ids:
                     self.logger.info(
@@ -873,17 +1124,13 @@ class Plugin(indigo.PluginBase):
             except Exception:
                 excluded_ids = set()
 
-        all_devices     = []
-        contact_sensors = []
-        motion_sensors  = []
+        all_devices = []
 
         for dev in indigo.devices:
             if self._disc_is_excluded_plugin(dev):
                 continue  # Skip virtual/Alexa plugin devices entirely
 
-            states     = self._disc_states(dev)
-            is_contact = self._disc_is_contact(dev, states)
-            is_motion  = (not is_contact) and self._disc_is_motion(dev, states)
+            folder, states, is_contact, is_motion = self._disc_cached(dev)
 
             # Skip non-sensor devices whose names contain exclusion keywords
             # (temperature, luminance, power, voltage, etc.) — these are not
@@ -893,7 +1140,6 @@ class Plugin(indigo.PluginBase):
             if not (is_contact or is_motion) and self._disc_is_name_excluded(dev):
                 continue
 
-            folder      = self._disc_folder_name(dev)
             sensor_type = ("contact" if is_contact
                            else "motion" if is_motion
                            else None)
@@ -904,27 +1150,37 @@ class Plugin(indigo.PluginBase):
                 "folder":      folder,
                 "enabled":     getattr(dev, "enabled", True),
                 "plugin_id":   getattr(dev, "pluginId", ""),
-                "on_state":    dev.onState if hasattr(dev, "onState") else None,
+                "on_state":    dev.onState if _has_onstate(dev) else None,
                 "states":      states,
                 "sensor_type": sensor_type,
             }
             all_devices.append(entry)
-            if is_contact:
-                contact_sensors.append(entry)
-            elif is_motion:
-                motion_sensors.append(entry)
 
-        all_devices.sort(    key=lambda x: x["name"].lower())
-        contact_sensors.sort(key=lambda x: x["name"].lower())
-        motion_sensors.sort( key=lambda x: x["name"].lower())
-
-        # Separate active (to be monitored) from excluded (commented-out by user choice)
-        active_contacts   = [d for d in contact_sensors if d["id"] not in excluded_ids]
-        excluded_contacts = [d for d in contact_sensors if d["id"] in excluded_ids]
-        active_motions    = [d for d in motion_sensors  if d["id"] not in excluded_ids]
-        excluded_motions  = [d for d in motion_sensors  if d["id"] in excluded_ids]
+        # Sort alphabetically once, then partition in a single pass - a
+        # stable partition of a sorted list is itself sorted. Sensors are
+        # also split into active (to be monitored) and excluded
+        # (commented-out by user choice).
+        all_devices.sort(key=lambda d: d["name"].lower())
+        contact_sensors   = []
+        motion_sensors    = []
+        active_contacts   = []
+        excluded_contacts = []
+        active_motions    = []
+        excluded_motions  = []
+        other             = []
+        for d in all_devices:
+            sensor_type = d["sensor_type"]
+            if sensor_type == "contact":
+                contact_sensors.append(d)
+                (excluded_contacts if d["id"] in excluded_ids else active_contacts).append(d)
+            elif sensor_type == "motion":
+                motion_sensors.append(d)
+                (excluded_motions if d["id"] in excluded_ids else active_motions).append(d)
+            else:
+                other.append(d)
 
         # --- Save device_discovery.json ---
+        tmp = DISCOVERY_OUTPUT_PATH + ".tmp"
         try:
             os.makedirs(os.path.dirname(DISCOVERY_OUTPUT_PATH), exist_ok=True)
             discovery_output = {
@@ -936,96 +1192,109 @@ class Plugin(indigo.PluginBase):
                 "motion_sensors":     motion_sensors,
                 "all_devices":        all_devices,
             }
-            with open(DISCOVERY_OUTPUT_PATH, "w", encoding="utf-8") as f:
-                json.dump(discovery_output, f, indent=2, default=str)
+            # Compact separators keep json.dumps on the C encoder
+            # (indent= forces the pure-Python path); the document then goes
+            # out in a single write.
+            data = json.dumps(discovery_output, separators=(",", ":"), default=str)
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, DISCOVERY_OUTPUT_PATH)
             self.logger.info(f"[{ts}] Full device list saved to: {DISCOVERY_OUTPUT_PATH}")
         except Exception as e:
+            _discard_tmp(tmp)
             self.logger.error(f"[{ts}] ERROR saving device_discovery.json: {e}")
 
         # --- Save device_activity_monitor_config.json ---
+        # Lines are written straight through the file as they are built; the
+        # config stays one entry per line (rather than one json.dumps of the
+        # whole document) so entries can be commented in and out by hand.
+        tmp = CONFIG_PATH + ".tmp"
         try:
-            lines = ["{"]
-            lines.append(f'  "_generated": "{datetime.now().isoformat()}",')
-            lines.append(f'  "_total_scanned": {len(all_devices)},')
-            lines.append('  "_usage": "Lines starting with # are ignored. '
-                         'Reload plugin after changes.",')
-            excl_list = ", ".join(str(x) for x in sorted(excluded_ids))
-            lines.append(f'  "excluded_ids": [{excl_list}],')
-            lines.append('  "_exclude_hint": "Add a device ID to excluded_ids to '
-                         'keep it commented-out after every re-discovery run.",')
-            lines.append("")
-            lines.append('  "devices": [')
-            lines.append("")
-
-            # Active contact sensors - one entry per device
-            if active_contacts:
-                lines.append("    # --- Contact / Door / Window sensors (active) ---")
-                for d in active_contacts:
-                    dev_obj = indigo.devices[d["id"]]
-                    lines.append(
-                        self._disc_config_entry(dev_obj, d["states"], commented=False) + ","
-                    )
-                lines.append("")
-
-            # Active motion sensors - one entry per detected state name
-            if active_motions:
-                lines.append("    # --- Motion / Occupancy / Presence sensors (active) ---")
-                for d in active_motions:
-                    dev_obj    = indigo.devices[d["id"]]
-                    mot_states = self._disc_motion_states(d["states"])
-                    for state_name in mot_states:
-                        lines.append(
-                            self._disc_motion_entry(dev_obj, state_name, commented=False) + ","
+            os.makedirs(os.path.dirname(CONFIG_PATH), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8", buffering=_WRITE_BUFFER_SIZE) as f:
+                def emit(line):
+                    f.write(line)
+                    f.write("\n")
+
+                emit("{")
+                emit(f'  "_generated": "{datetime.now().isoformat()}",')
+                emit(f'  "_total_scanned": {len(all_devices)},')
+                emit('  "_usage": "Lines starting with # are ignored. '
+                     'Reload plugin after changes.",')
+                excl_list = ", ".join(str(x) for x in sorted(excluded_ids))
+                emit(f'  "excluded_ids": [{excl_list}],')
+                emit('  "_exclude_hint": "Add a device ID to excluded_ids to '
+                     'keep it commented-out after every re-discovery run.",')
+                emit("")
+                emit('  "devices": [')
+                emit("")
+
+                # Active contact sensors - one entry per device
+                if active_contacts:
+                    emit("    # --- Contact / Door / Window sensors (active) ---")
+                    for d in active_contacts:
+                        dev_obj = indigo.devices[d["id"]]
+                        emit(
+                            self._disc_config_entry(dev_obj, d["states"], commented=False) + ","
                         )
-                lines.append("")
-
-            # Excluded sensors - written commented-out, preserved across re-discovery
-            if excluded_contacts or excluded_motions:
-                lines.append(
-                    "    # --- Excluded sensors "
-                    "(add ID to 'excluded_ids' above to keep excluded on re-discovery) ---"
-                )
-                for d in excluded_contacts:
-                    dev_obj = indigo.devices[d["id"]]
-                    lines.append(
-                        self._disc_config_entry(dev_obj, d["states"], commented=True) + ","
+                    emit("")
+
+                # Active motion sensors - one entry per detected state name
+                if active_motions:
+                    emit("    # --- Motion / Occupancy / Presence sensors (active) ---")
+                    for d in active_motions:
+                        dev_obj    = indigo.devices[d["id"]]
+                        mot_states = self._disc_motion_states(d["states"])
+                        for state_name in mot_states:
+                            emit(
+                                self._disc_motion_entry(dev_obj, state_name, commented=False) + ","
+                            )
+                    emit("")
+
+                # Excluded sensors - written commented-out, preserved across re-discovery
+                if excluded_contacts or excluded_motions:
+                    emit(
+                        "    # --- Excluded sensors "
+                        "(add ID to 'excluded_ids' above to keep excluded on re-discovery) ---"
                     )
-                for d in excluded_motions:
-                    dev_obj    = indigo.devices[d["id"]]
-                    mot_states = self._disc_motion_states(d["states"])
-                    for state_name in mot_states:
-                        lines.append(
-                            self._disc_motion_entry(dev_obj, state_name, commented=True) + ","
+                    for d in excluded_contacts:
+                        dev_obj = indigo.devices[d["id"]]
+                        emit(
+                            self._disc_config_entry(dev_obj, d["states"], commented=True) + ","
                         )
-                lines.append("")
-
-            # All other devices commented out for reference only
-            other = [d for d in all_devices if d["sensor_type"] is None]
-            if other:
-                lines.append("    # --- Other devices (not contact/motion - remove # to enable) ---")
-                for d in other:
-                    dev_obj = indigo.devices[d["id"]]
-                    lines.append(
-                        self._disc_config_entry(dev_obj, d["states"], commented=True) + ","
-                    )
-                lines.append("")
-
-            lines.append('  ],')
-            lines.append("")
-            lines.append('  "variables": [')
-            lines.append("")
-            lines.append(
-                '    # Add variables: {"id": 123456789, "name": "Var_Name", "label": "Display Label"}'
-            )
-            lines.append("")
-            lines.append('  ]')
-            lines.append("}")
-
-            os.makedirs(os.path.dirname(CONFIG_PATH), exist_ok=True)
-            with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-                f.write("\n".join(lines) + "\n")
+                    for d in excluded_motions:
+                        dev_obj    = indigo.devices[d["id"]]
+                        mot_states = self._disc_motion_states(d["states"])
+                        for state_name in mot_states:
+                            emit(
+                                self._disc_motion_entry(dev_obj, state_name, commented=True) + ","
+                            )
+                    emit("")
+
+                # All other devices commented out for reference only
+                if other:
+                    emit("    # --- Other devices (not contact/motion - remove # to enable) ---")
+                    for d in other:
+                        dev_obj = indigo.devices[d["id"]]
+                        emit(
+                            self._disc_config_entry(dev_obj, d["states"], commented=True) + ","
+                        )
+                    emit("")
+
+                emit('  ],')
+                emit("")
+                emit('  "variables": [')
+                emit("")
+                emit(
+                    '    # Add variables: {"id": 123456789, "name": "Var_Name", "label": "Display Label"}'
+                )
+                emit("")
+                emit('  ]')
+                emit("}")
+            os.replace(tmp, CONFIG_PATH)
             self.logger.info(f"[{ts}] Plugin config saved to: {CONFIG_PATH}")
         except Exception as e:
+            _discard_tmp(tmp)
             self.logger.error(f"[{ts}] ERROR saving device_activity_monitor_config.json: {e}")
 
         # --- Summary ---
@@ -1062,19 +1331,19 @@ class Plugin(indigo.PluginBase):
             if self._disc_is_excluded_plugin(dev):
                 continue  # Skip virtual devices and other excluded plugin devices
 
-            states = self._disc_states(dev)
-            if self._disc_is_contact(dev, states):
+            folder, states, is_contact, is_motion = self._disc_cached(dev)
+            if is_contact:
                 contact_found.append({
                     "id":     dev.id,
                     "name":   dev.name,
-                    "folder": self._disc_folder_name(dev),
+                    "folder": folder,
                     "states": states,
                 })
-            elif self._disc_is_motion(dev, states):
+            elif is_motion:
                 motion_found.append({
                     "id":     dev.id,
                     "name":   dev.name,
-                    "folder": self._disc_folder_name(dev),
+                    "folder": folder,
                     "states": states,
                 })
 
@@ -1084,14 +1353,14 @@ class Plugin(indigo.PluginBase):
         else:
             if contact_found:
                 self.logger.info(f"[{ts}] Contact sensors ({len(contact_found)}):")
-                for d in sorted(contact_found, key=lambda x: x["name"]):
+                for d in sorted(contact_found, key=itemgetter("name")):
                     dev_obj = indigo.devices[d["id"]]
                     entry   = self._disc_config_entry(dev_obj, d["states"], commented=False)
                     self.logger.info(f"[{ts}]   {d['name']}  (ID: {d['id']}, Folder: {d['folder']})")
                     self.logger.info(f"[{ts}]   {entry}")
             if motion_found:
                 self.logger.info(f"[{ts}] Motion sensors ({len(motion_found)}):")
-                for d in sorted(motion_found, key=lambda x: x["name"]):
+                for d in sorted(motion_found, key=itemgetter("name")):
                     mot_states = self._disc_motion_states(d["states"])
                     self.logger.info(f"[{ts}]   {d['name']}  (ID: {d['id']}, Folder: {d['folder']})")
                     dev_obj = indigo.devices[d["id"]]
@@ -1105,12 +1374,26 @@ class Plugin(indigo.PluginBase):
         """Reload device_activity_monitor_config.json without a full plugin restart.
 
         Equivalent to a plugin reload for config changes, but preserves
-        the existing device/variable subscriptions.
+        the existing device/variable subscriptions. If the file has not been
+        modified since it was last parsed the parse is skipped; validation
+        still runs so newly created / deleted devices are reported.
         """
         old_dev_count = len(self.device_monitor)
         old_var_count = len(self.variable_monitor)
 
-        self._load_config()
+        try:
+            unchanged = (self._config_fingerprint is not None
+                         and self._config_path == CONFIG_PATH
+                         and _file_fingerprint(CONFIG_PATH) == self._config_fingerprint)
+        except OSError:
+            unchanged = False
+        if unchanged:
+            self.logger.info(
+                "[Device Activity Monitor] Config file unchanged since last load - "
+                "skipping re-parse"
+            )
+        else:
+            self._load_config()
         self._validate_monitored_devices()
         self._validate_monitored_variables()
 
@@ -1150,8 +1433,7 @@ class Plugin(indigo.PluginBase):
         'temperature' but whose states include 'contact' is still picked up
         correctly as a contact sensor.
         """
-        name_lower = dev.name.lower()
-        return any(kw in name_lower for kw in _NAME_EXCLUSION_KEYWORDS)
+        return _NAME_EXCLUSION_RE.search(dev.name) is not None
 
     def _disc_folder_name(self, dev):
         """Return dev's Indigo folder name, or '(root)' if in root or on error."""
@@ -1163,12 +1445,39 @@ class Plugin(indigo.PluginBase):
         return "(root)"
 
     def _disc_states(self, dev):
-        """Return a dict of state name -> current value for dev."""
+        """Return a dict of state name -> current value for dev.
+
+        dict() copies a mapping in one C-level pass, as get_states() does in
+        discover_devices.py; the per-key comprehension only remains for state
+        objects that iterate but have no keys().
+        """
         try:
-            return {k: dev.states[k] for k in dev.states}
+            states = dev.states
+            if hasattr(states, "keys"):
+                return dict(states)
+            return {k: states[k] for k in states}
         except Exception:
             return {}
 
+    def _disc_cached(self, dev):
+        """Return dev's DiscoveryEntry, classifying it only on a cache miss.
+
+        Entries are stamped with dev.lastChanged and also dropped by
+        deviceUpdated() / deviceDeleted(), so renames and folder moves are
+        picked up on the next discovery run.
+        """
+        stamp  = getattr(dev, "lastChanged", None)
+        cached = self._discovery_cache.get(dev.id)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        states     = self._disc_states(dev)
+        is_contact = self._disc_is_contact(dev, states)
+        is_motion  = (not is_contact) and self._disc_is_motion(dev, states)
+        entry = DiscoveryEntry(self._disc_folder_name(dev), states,
+                               is_contact, is_motion)
+        self._discovery_cache[dev.id] = (stamp, entry)
+        return entry
+
     def _disc_z2m_capabilities(self, dev):
         """Return dict of Zigbee2MQTT-Bridge has_* capability flags for dev.
 
@@ -1244,22 +1553,22 @@ class Plugin(indigo.PluginBase):
             return False
 
         # 3. Motion keyword veto — beats state-key match
-        name_lower = dev.name.lower()
-        if any(kw in name_lower for kw in _MOTION_NAME_KEYWORDS):
+        name = dev.name
+        if _MOTION_NAME_RE.search(name):
             return False
 
         # 4. State-name match — skip for Z2M generic devices: the contact
         #    state field is a stub and may not reflect the real device type.
         is_z2m_generic = bool(z2m_caps)  # generic if we got here with z2m_caps
-        if not is_z2m_generic and (_CONTACT_STATE_NAMES & set(states.keys())):
+        if not is_z2m_generic and not _CONTACT_STATE_NAMES.isdisjoint(states):
             return True
 
         # 5. Name-keyword match
-        if not hasattr(dev, "onState"):
+        if not _has_onstate(dev):
             return False
-        if any(kw in name_lower for kw in _NAME_EXCLUSION_KEYWORDS):
+        if _NAME_EXCLUSION_RE.search(name):
             return False
-        return any(kw in name_lower for kw in _CONTACT_NAME_KEYWORDS)
+        return _CONTACT_NAME_RE.search(name) is not None
 
     def _disc_is_motion(self, dev, states):
         """Return True if dev looks like a motion/occupancy/presence sensor.
@@ -1292,15 +1601,15 @@ class Plugin(indigo.PluginBase):
 
         # State-name match — skip for Z2M generic devices (stub fields unreliable).
         is_z2m_generic = bool(z2m_caps)
-        if not is_z2m_generic and (_MOTION_STATE_NAMES & set(states.keys())):
+        if not is_z2m_generic and not _MOTION_STATE_NAMES.isdisjoint(states):
             return True
 
-        if not hasattr(dev, "onState"):
+        if not _has_onstate(dev):
             return False
-        name_lower = dev.name.lower()
-        if any(kw in name_lower for kw in _NAME_EXCLUSION_KEYWORDS):
+        name = dev.name
+        if _NAME_EXCLUSION_RE.search(name):
             return False
-        return any(kw in name_lower for kw in _MOTION_NAME_KEYWORDS)
+        return _MOTION_NAME_RE.search(name) is not None
 
     def _disc_motion_states(self, states):
         """Return the single preferred motion state name as a one-element list.
@@ -1322,12 +1631,7 @@ class Plugin(indigo.PluginBase):
 
         commented=True  prepends '# ' so the entry is disabled by default.
         """
-        line = (
-            f'    {{"id": {dev.id}, "name": "{dev.name}", '
-            f'"state": "{state}", "label": "{dev.name}", '
-            f'"on_text": "{on_text}", "off_text": "{off_text}"}}'
-        )
-        return f"# {line}" if commented else line
+        return _entry_line(dev.id, dev.name, state, on_text, off_text, commented)
 
     def _disc_config_entry(self, dev, states, commented=False):
         """Return a JSON config file line for a CONTACT sensor device.
@@ -1366,45 +1670,72 @@ class Plugin(indigo.PluginBase):
         file is easier to edit by hand.
 
         config_path  optional path override (used by tests).
+
+        The file's (mtime_ns, size) fingerprint is recorded in
+        self._config_fingerprint after a successful parse (None for the
+        fallback dicts). menuReloadConfig uses it to skip the reload
+        altogether when the file is unchanged.
         """
         path = config_path or CONFIG_PATH
+        self._config_path        = path
+        self._config_fingerprint = None
+
+        # Per-state log throttle, seconds (0 = off). Only the config file
+        # can set it; _last_logged maps (dev_id, state_name) to the
+        # (state_text, time.monotonic()) of the last line logged.
+        self.log_throttle = 0.0
+        self._last_logged = {}
 
         if not os.path.exists(path):
-            # No config file - use the module-level fallback dicts (deep copy)
-            self.device_monitor   = {k: [dict(s) for s in v]
-                                     for k, v in DEVICE_MONITOR.items()}
-            self.variable_monitor = {k: dict(v)
-                                     for k, v in VARIABLE_MONITOR.items()}
+            # No config file - use the module-level fallback dicts
+            self._use_fallback_monitors()
             return
 
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
+            fingerprint = _file_fingerprint(path)
 
-            # Strip comment lines (first non-whitespace char is #)
-            active_lines = [l for l in lines if not l.lstrip().startswith("#")]
-            json_str     = "".join(active_lines)
-
-            # Remove trailing commas before ] or } (not valid JSON)
-            json_str = re.sub(r",(\s*[}\]])", r"\1", json_str)
+            # One read() of the whole file on a raw fd - configs are small,
+            # and this skips the buffered text-IO layers entirely.
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                raw = os.read(fd, os.fstat(fd).st_size).decode("utf-8")
+            finally:
+                os.close(fd)
 
-            config = json.loads(json_str)
+            # Strip comment lines (first non-whitespace char is #), then
+            # trailing commas before ] or } (not valid JSON)
+            json_str = _COMMENT_LINE_RE.sub("", raw)
+            json_str = _TRAILING_COMMA_RE.sub(r"\1", json_str)
+            config   = _json_loads(json_str)
 
         except Exception as e:
             # File exists but unreadable or invalid - fall back and warn
-            self.device_monitor   = {k: [dict(s) for s in v]
-                                     for k, v in DEVICE_MONITOR.items()}
-            self.variable_monitor = {k: dict(v)
-                                     for k, v in VARIABLE_MONITOR.items()}
+            self._use_fallback_monitors()
             try:
                 self.logger.warning(
-                    f"[Device Activity Monitor] Could not read config file: {e} - "
-                    f"using hardcoded fallback dicts"
+                    "[Device Activity Monitor] Could not read config file: %s - "
+                    "using hardcoded fallback dicts", e
                 )
             except Exception:
                 pass  # logger may not be ready during __init__
             return
 
+        self._apply_config(config)
+        self._config_fingerprint = fingerprint
+
+        # Groups are damGroup Indigo devices as of v1.8.1; they're loaded
+        # by deviceStartComm, not by this method. self.device_groups is
+        # untouched here.
+        try:
+            self.logger.info(
+                "[Device Activity Monitor] Config loaded from: %s (%d devices, %d variables)",
+                path, len(self.device_monitor), len(self.variable_monitor)
+            )
+        except Exception:
+            pass  # logger may not be ready during __init__
+
+    def _apply_config(self, config):
+        """Build device_monitor / variable_monitor / log_throttle from parsed JSON."""
         # --- Build self.device_monitor from "devices" list ---
         self.device_monitor = {}
         for entry in config.get("devices", []):
@@ -1431,70 +1762,133 @@ class Plugin(indigo.PluginBase):
                 "label": entry.get("label", entry.get("name", f"Variable {var_id}"))
             }
 
-        # Groups are damGroup Indigo devices as of v1.8.1; they're loaded
-        # by deviceStartComm, not by this method. self.device_groups is
-        # untouched here.
+        # Optional "log_throttle_ms": suppress repeats of the same state
+        # text within this many milliseconds. A hand-edited bad value
+        # ("500ms", null) turns the throttle off rather than failing the load.
+        throttle_ms = config.get("log_throttle_ms", 0)
         try:
-            self.logger.info(
-                f"[Device Activity Monitor] Config loaded from: {path} "
-                f"({len(self.device_monitor)} devices, "
-                f"{len(self.variable_monitor)} variables)"
-            )
-        except Exception:
-            pass  # logger may not be ready during __init__
+            self.log_throttle = max(0.0, float(throttle_ms)) / 1000.0
+        except (TypeError, ValueError):
+            self.log_throttle = 0.0
+            try:
+                self.logger.warning(
+                    "[Device Activity Monitor] Ignoring invalid log_throttle_ms %r - "
+                    "log throttle disabled", throttle_ms
+                )
+            except Exception:
+                pass  # logger may not be ready during __init__
 
-    def _validate_monitored_devices(self):
-        """Check all device_monitor entries exist in Indigo at startup."""
-        missing = []
-        found   = []
+        self._rebuild_monitor_index()
 
-        for device_id in self.device_monitor:
-            if device_id in indigo.devices:
-                found.append(f"  [OK] {indigo.devices[device_id].name} (ID: {device_id})")
-            else:
-                missing.append(f"  [!]  ID {device_id} - not found in Indigo")
+    def _use_fallback_monitors(self):
+        """Switch to the hardcoded DEVICE_MONITOR / VARIABLE_MONITOR entries.
 
-        self.logger.info(f"[Device Activity Monitor] Device validation - {len(found)} found, {len(missing)} missing:")
-        for entry in found:
-            self.logger.info(entry)
+        Only the top-level dicts are copied (tests and callers add IDs to
+        them); the per-entry snapshots are shared with every fallback load.
+        """
+        self.device_monitor   = dict(_FALLBACK_DEVICE_MONITOR)
+        self.variable_monitor = dict(_FALLBACK_VARIABLE_MONITOR)
+        self._rebuild_monitor_index()
 
-        if missing:
-            for entry in missing:
-                self.logger.warning(entry)
-            self.logger.warning(
-                f"[Device Activity Monitor] {len(missing)} monitored device(s) not found - "
-                f"check IDs in config file or DEVICE_MONITOR in plugin.py"
+    def _rebuild_monitor_index(self):
+        """Pre-bake device_monitor into the tuples deviceUpdated() walks.
+
+        device_monitor keeps the config-file shape (list of dicts per device).
+        deviceUpdated() runs for every device change in Indigo, so the
+        defaults are resolved here once instead of by dict.get() per event:
+
+          {dev_id: ((state, is_onstate, label, on_text, off_text,
+                     on_value, off_value), ...)}
+
+        on_value / off_value are normalised to tuples (a single configured
+        value becomes a 1-tuple) so deviceUpdated() matches with a plain
+        "in" test; None still means "not configured".
+
+        State names, labels and on/off texts are interned (non-strings pass
+        through), so the many rows sharing "onState", "Occupancy", "ON",
+        "OPEN" etc. hold one string object each instead of one per entry
+        the JSON parser returned.
+
+        Also freezes the monitored device and variable IDs into frozensets
+        for the membership-only checks in the other callbacks, and flattens
+        variable_monitor to {var_id: label} (None when no label is set) for
+        variableUpdated().
+
+        Call again after any change to device_monitor or variable_monitor.
+        """
+        self._monitored_dev_ids = frozenset(self.device_monitor)
+        self._monitored_var_ids = frozenset(self.variable_monitor)
+        self._var_labels        = {var_id: config.get("label")
+                                   for var_id, config in self.variable_monitor.items()}
+        self._monitor = {
+            dev_id: tuple(
+                (
+                    _intern(config["state"]),
+                    config["state"] == "onState",
+                    _intern(config["label"]),
+                    _intern(config.get("on_text",  "ON")),
+                    _intern(config.get("off_text", "OFF")),
+                    _value_tuple(config.get("on_value")),
+                    _value_tuple(config.get("off_value")),
+                )
+                for config in configs
             )
-        else:
-            self.logger.info("[Device Activity Monitor] All monitored devices validated OK")
+            for dev_id, configs in self.device_monitor.items()
+        }
+
+    def _validate_monitored_devices(self):
+        """Check all device_monitor entries exist in Indigo at startup."""
+        self._validate(self.device_monitor, indigo.devices, "device", "DEVICE_MONITOR")
 
     def _validate_monitored_variables(self):
         """Check all variable_monitor entries exist in Indigo at startup."""
         if not self.variable_monitor:
             return
+        self._validate(self.variable_monitor, indigo.variables, "variable", "VARIABLE_MONITOR")
 
+    def _validate(self, ids, collection, kind, fallback_name):
+        """Report which monitored ids exist in collection.
+
+        collection     indigo.devices or indigo.variables
+        kind           "device" / "variable", used in the messages
+        fallback_name  module-level dict the ids may have come from
+
+        One multi-line log call per list rather than one per entry - each
+        logger call is a round-trip to the Indigo server.
+        """
+        # The per-entry [OK] lines are only built when INFO is enabled;
+        # missing ids are always collected for the warning.
+        info_on = self.logger.isEnabledFor(logging.INFO)
         missing = []
         found   = []
 
-        for var_id in self.variable_monitor:
-            if var_id in indigo.variables:
-                found.append(f"  [OK] {indigo.variables[var_id].name} (ID: {var_id})")
-            else:
-                missing.append(f"  [!]  ID {var_id} - not found in Indigo")
+        # One indexing call per id; a missing id raises KeyError from
+        # indigo.devices / indigo.variables just as it does from a dict.
+        for item_id in ids:
+            try:
+                item = collection[item_id]
+            except KeyError:
+                missing.append(item_id)
+                continue
+            if info_on:
+                found.append((item.name, item_id))
 
-        self.logger.info(f"[Device Activity Monitor] Variable validation - {len(found)} found, {len(missing)} missing:")
-        for entry in found:
-            self.logger.info(entry)
+        if info_on:
+            self.logger.info(
+                "[Device Activity Monitor] %s validation - %d found, %d missing:%s",
+                kind.capitalize(), len(ids) - len(missing), len(missing),
+                "".join(f"\n  [OK] {name} (ID: {item_id})" for name, item_id in found)
+            )
 
         if missing:
-            for entry in missing:
-                self.logger.warning(entry)
             self.logger.warning(
-                f"[Device Activity Monitor] {len(missing)} monitored variable(s) not found - "
-                f"check IDs in config file or VARIABLE_MONITOR in plugin.py"
+                "[Device Activity Monitor] %d monitored %s(s) not found - "
+                "check IDs in config file or %s in plugin.py:%s",
+                len(missing), kind, fallback_name,
+                "".join(f"\n  [!]  ID {item_id} - not found in Indigo" for item_id in missing)
             )
         else:
-            self.logger.info("[Device Activity Monitor] All monitored variables validated OK")
+            self.logger.info("[Device Activity Monitor] All monitored %ss validated OK", kind)
 
     # ======================================
     # Menu handlers
@@ -13,10 +13,12 @@
 
 import sys
 import os
+import collections
+import re
 import tempfile
+import types
 import unittest
 import importlib.util
-from unittest.mock import MagicMock
 
 # ======================================
 # MOCK INDIGO MODULE
@@ -24,7 +26,15 @@ from unittest.mock import MagicMock
 # ======================================
 
 class MockDevice:
-    """Simulates an Indigo device object."""
+    """Simulates an Indigo device object.
+
+    __slots__ also makes a typo'd attribute assignment in a test fail rather
+    than silently add a new attribute; deviceTypeId is left unset unless a
+    test assigns it, so getattr(dev, "deviceTypeId", "") sees the default.
+    """
+    __slots__ = ("id", "name", "onState", "states", "enabled",
+                 "folderId", "pluginId", "deviceTypeId")
+
     def __init__(self, dev_id, name, on_state=False, states=None, enabled=True, plugin_id=""):
         self.id       = dev_id
         self.name     = name
@@ -45,6 +55,8 @@ class MockThermostatDevice:
     types (thermostats, plain button devices) from contact sensor candidates,
     even when their names contain keywords like 'door' or 'garage'.
     """
+    __slots__ = ("id", "name", "states", "enabled", "folderId", "pluginId")
+
     def __init__(self, dev_id, name, states=None, enabled=True, plugin_id=""):
         self.id       = dev_id
         self.name     = name
@@ -74,6 +86,8 @@ class MockDevices(dict):
 
 class MockVariable:
     """Simulates an Indigo variable object."""
+    __slots__ = ("id", "name", "value")
+
     def __init__(self, var_id, name, value=""):
         self.id    = var_id
         self.name  = name
@@ -96,7 +110,7 @@ class MockPluginBase:
         self.pluginDisplayName = pluginDisplayName
         self.pluginVersion     = pluginVersion
         self.pluginPrefs       = pluginPrefs
-        self.logger            = MagicMock()
+        self.logger            = _RecordingLogger()
 
     def deviceUpdated(self, origDev, newDev):
         pass  # super() in plugin lands here
@@ -111,13 +125,71 @@ class MockPluginBase:
         pass  # super() in plugin lands here
 
 
-# Build and inject the mock indigo module
-mock_indigo            = MagicMock()
-mock_indigo.PluginBase = MockPluginBase
-mock_indigo.devices    = MockDevices()
-mock_indigo.variables  = MockVariables()
-mock_indigo.server     = MagicMock()
-sys.modules['indigo']  = mock_indigo
+class _LogSink:
+    """Stand-in for indigo.server.log - records each message in self.calls.
+
+    A plain list append per call instead of MagicMock's call recording.
+    """
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, msg, *args, **kwargs):
+        self.calls.append(msg)
+
+    def reset_mock(self):
+        self.calls.clear()
+
+
+class _LevelSink(_LogSink):
+    """One level of _RecordingLogger, e.g. plugin.logger.warning.
+
+    The plugin logs with %-style lazy arguments, e.g.
+    logger.info("  [OK] %s (ID: %s)", name, dev_id), so the arguments are
+    applied as each call is recorded and self.calls holds finished text.
+    """
+    def __call__(self, msg, *args, **kwargs):
+        self.calls.append(msg % args if args else str(msg))
+
+
+class _RecordingLogger:
+    """Stand-in for plugin.logger with one _LevelSink per level used.
+
+    isEnabledFor() answers self.enabled for every level (True by default).
+    """
+    def __init__(self):
+        self.debug   = _LevelSink()
+        self.info    = _LevelSink()
+        self.warning = _LevelSink()
+        self.error   = _LevelSink()
+        self.enabled = True
+
+    def isEnabledFor(self, level):
+        return self.enabled
+
+
+class _MockServer:
+    """Stand-in for indigo.server - only what plugin.py / plugin_utils.py use.
+
+    No getInstallFolderPath(): plugin.py falls back to its default paths,
+    exactly as it did when the MagicMock returned a non-string.
+    """
+    version    = "2025.1"
+    apiVersion = "3.6"
+
+    def __init__(self):
+        self.log = _LogSink()
+
+
+# Build and inject the mock indigo module. A plain namespace rather than a
+# MagicMock, so an attribute the plugin uses but the harness doesn't model
+# fails loudly instead of returning another mock.
+mock_indigo = types.SimpleNamespace(
+    PluginBase = MockPluginBase,
+    devices    = MockDevices(),
+    variables  = MockVariables(),
+    server     = _MockServer(),
+)
+sys.modules['indigo'] = mock_indigo
 
 
 # ======================================
@@ -165,24 +237,37 @@ _VARIABLE_NAMES = {
     241032502: "Lux_Level",
 }
 
+# Event-log line prefix written by plugin._ts(): [HH:MM:SS.mmm]
+_TS_RE = re.compile(r"^\[\d{2}:\d{2}:\d{2}\.\d{3}\]")
+
+
+# One MockDevice / MockVariable per monitored ID, built once and shared by
+# every registry below. Tests never mutate registry objects - they build
+# fresh MockDevice / MockVariable instances to pass to the callbacks - so
+# each registry only needs its own dict, not its own objects.
+_PRISTINE_DEVICES = {
+    dev_id: MockDevice(dev_id, _DEVICE_NAMES.get(dev_id, f"Device {dev_id}"))
+    for dev_id in DEVICE_MONITOR
+}
+_PRISTINE_VARIABLES = {
+    var_id: MockVariable(var_id, _VARIABLE_NAMES.get(var_id, f"Variable {var_id}"), "0")
+    for var_id in VARIABLE_MONITOR
+}
+
 
 def make_device_registry(missing_ids=None):
     """Return a MockDevices dict populated with all DEVICE_MONITOR entries."""
-    missing_ids = set(missing_ids or [])
-    registry    = MockDevices()
-    for dev_id in DEVICE_MONITOR:
-        if dev_id not in missing_ids:
-            registry[dev_id] = MockDevice(dev_id, _DEVICE_NAMES.get(dev_id, f"Device {dev_id}"))
+    registry = MockDevices(_PRISTINE_DEVICES)
+    for dev_id in missing_ids or ():
+        registry.pop(dev_id, None)
     return registry
 
 
 def make_variable_registry(missing_ids=None):
     """Return a MockVariables dict populated with all VARIABLE_MONITOR entries."""
-    missing_ids = set(missing_ids or [])
-    registry    = MockVariables()
-    for var_id in VARIABLE_MONITOR:
-        if var_id not in missing_ids:
-            registry[var_id] = MockVariable(var_id, _VARIABLE_NAMES.get(var_id, f"Variable {var_id}"), "0")
+    registry = MockVariables(_PRISTINE_VARIABLES)
+    for var_id in missing_ids or ():
+        registry.pop(var_id, None)
     return registry
 
 
@@ -192,18 +277,57 @@ def make_plugin(prefs=None):
     No config file is present in the test environment, so _load_config()
     falls back to the module-level DEVICE_MONITOR / VARIABLE_MONITOR dicts.
     Call plugin._load_config(path) afterwards to test file-based loading.
+
+    The startup banner from __init__ goes to indigo.server.log, so the mock
+    is reset afterwards - tests only see output from the calls they make.
     """
-    return Plugin(
+    plugin = Plugin(
         "com.clives.indigoplugin.sensormonitor",
         "Sensor Monitor",
         "1.4.0",
         prefs or {}
     )
+    mock_indigo.server.log.reset_mock()
+    return plugin
 
 
 def server_log_messages():
     """Return list of strings passed to indigo.server.log() since last reset."""
-    return [c.args[0] for c in mock_indigo.server.log.call_args_list]
+    return list(mock_indigo.server.log.calls)
+
+
+def server_log_lines():
+    """Return server_log_messages() split into individual lines.
+
+    deviceUpdated() sends every state line of one update in a single call,
+    so per-line assertions (e.g. endswith("ON")) must look at lines, not
+    calls - as logger_lines() does for the validation output.
+    """
+    return logger_lines(mock_indigo.server.log)
+
+
+def server_log_contains(*needles):
+    """True if one event-log line contains every needle - see logged()."""
+    return logged(mock_indigo.server.log, *needles)
+
+
+def logger_lines(log_method):
+    """Return the messages logged at one level (or sink) split into lines.
+
+    Validation output is batched into one multi-line call per list, so
+    per-device assertions count lines rather than calls.
+    """
+    return [line for msg in log_method.calls for line in msg.split("\n")]
+
+
+def logged(log_method, *needles):
+    """True if one logged line at this level contains every needle.
+
+    The substring check for every test that doesn't need line positions
+    (endswith etc.): several needles must share one line (a device's name
+    AND its ID), and the scan stops at the first match.
+    """
+    return any(all(n in line for n in needles) for line in logger_lines(log_method))
 
 
 # ======================================
@@ -222,7 +346,7 @@ class TestStartupValidation(unittest.TestCase):
         plugin = make_plugin()
         plugin.startup()
 
-        info_calls     = [str(c) for c in plugin.logger.info.call_args_list]
+        info_calls     = logger_lines(plugin.logger.info)
         device_id_strs = [str(dev_id) for dev_id in DEVICE_MONITOR]
         ok_count       = sum(
             1 for c in info_calls
@@ -238,14 +362,14 @@ class TestStartupValidation(unittest.TestCase):
         plugin = make_plugin()
         plugin.startup()
 
-        info_text = " ".join(str(c) for c in plugin.logger.info.call_args_list)
-        self.assertIn("All monitored devices validated OK", info_text)
+        self.assertTrue(logged(plugin.logger.info, "All monitored devices validated OK"),
+            msg=f"Got: {plugin.logger.info.calls}")
 
     def test_all_devices_found_no_warnings(self):
         """startup() produces no warnings when all devices are present."""
         plugin = make_plugin()
         plugin.startup()
-        plugin.logger.warning.assert_not_called()
+        self.assertEqual(plugin.logger.warning.calls, [])
 
     def test_missing_devices_log_bang_per_missing(self):
         """startup() logs [!] for each missing device ID."""
@@ -255,7 +379,7 @@ class TestStartupValidation(unittest.TestCase):
         plugin = make_plugin()
         plugin.startup()
 
-        warn_calls   = [str(c) for c in plugin.logger.warning.call_args_list]
+        warn_calls   = logger_lines(plugin.logger.warning)
         bang_count   = sum(1 for c in warn_calls if "[!]" in c)
 
         self.assertEqual(bang_count, len(missing),
@@ -270,8 +394,21 @@ class TestStartupValidation(unittest.TestCase):
         plugin = make_plugin()
         plugin.startup()
 
-        warn_text = " ".join(str(c) for c in plugin.logger.warning.call_args_list)
-        self.assertIn("2 monitored device(s) not found", warn_text)
+        self.assertTrue(logged(plugin.logger.warning, "2 monitored device(s) not found"),
+            msg=f"Got: {plugin.logger.warning.calls}")
+
+    def test_info_disabled_skips_ok_lines_but_still_warns(self):
+        """With INFO disabled, no [OK] list is logged; missing devices still warn."""
+        mock_indigo.devices = make_device_registry(missing_ids=[812537401])
+
+        plugin = make_plugin()
+        plugin.logger.enabled = False
+        plugin.startup()
+
+        self.assertFalse(logged(plugin.logger.info, "[OK]"),
+            msg=f"Got: {plugin.logger.info.calls}")
+        self.assertTrue(logged(plugin.logger.warning, "1 monitored device(s) not found"),
+            msg=f"Got: {plugin.logger.warning.calls}")
 
     def test_subscribetochanges_called_on_startup(self):
         """startup() calls indigo.devices.subscribeToChanges()."""
@@ -293,7 +430,6 @@ class TestDeviceUpdatedOnState(unittest.TestCase):
 
     def setUp(self):
         mock_indigo.server.log.reset_mock()
-        mock_indigo.devices = make_device_registry()
         self.plugin = make_plugin()
 
     def test_false_to_true_logs_on(self):
@@ -302,7 +438,7 @@ class TestDeviceUpdatedOnState(unittest.TestCase):
         new  = MockDevice(812537401, "Basin Occupancy Sensor", on_state=True)
         self.plugin.deviceUpdated(orig, new)
 
-        msgs = server_log_messages()
+        msgs = server_log_lines()
         self.assertTrue(
             any("Basin Occupancy Sensor" in m and "Occupancy" in m and m.endswith("ON")
                 for m in msgs),
@@ -315,7 +451,7 @@ class TestDeviceUpdatedOnState(unittest.TestCase):
         new  = MockDevice(812537401, "Basin Occupancy Sensor", on_state=False)
         self.plugin.deviceUpdated(orig, new)
 
-        msgs = server_log_messages()
+        msgs = server_log_lines()
         self.assertTrue(
             any("Basin Occupancy Sensor" in m and "Occupancy" in m and m.endswith("OFF")
                 for m in msgs),
@@ -328,7 +464,7 @@ class TestDeviceUpdatedOnState(unittest.TestCase):
         new  = MockDevice(812537401, "Basin Occupancy Sensor", on_state=False)
         self.plugin.deviceUpdated(orig, new)
 
-        mock_indigo.server.log.assert_not_called()
+        self.assertEqual(server_log_messages(), [])
 
     def test_label_same_as_device_name_not_duplicated(self):
         """When label equals device name, name is printed once, not twice.
@@ -338,15 +474,14 @@ class TestDeviceUpdatedOnState(unittest.TestCase):
         not '[ts] Side Passage Motion Side Passage Motion OFF'.
         """
         self.plugin.device_monitor[333333] = [{"state": "onState", "label": "My Test Sensor"}]
+        self.plugin._rebuild_monitor_index()
         orig = MockDevice(333333, "My Test Sensor", on_state=True)
         new  = MockDevice(333333, "My Test Sensor", on_state=False)
         self.plugin.deviceUpdated(orig, new)
 
-        msgs = server_log_messages()
-        self.assertFalse(
-            any("My Test Sensor My Test Sensor" in m for m in msgs),
-            msg=f"Device name should not appear twice. Got: {msgs}"
-        )
+        msgs = server_log_lines()
+        self.assertFalse(server_log_contains("My Test Sensor My Test Sensor"),
+            msg=f"Device name should not appear twice. Got: {msgs}")
         self.assertTrue(
             any("My Test Sensor" in m and m.endswith("OFF") for m in msgs),
             msg=f"Expected single name + state. Got: {msgs}"
@@ -358,10 +493,9 @@ class TestDeviceUpdatedOnState(unittest.TestCase):
         new  = MockDevice(812537401, "Basin Occupancy Sensor", on_state=True)
         self.plugin.deviceUpdated(orig, new)
 
-        msgs = server_log_messages()
         self.assertTrue(
-            any("Basin Occupancy Sensor" in m and "Occupancy" in m for m in msgs),
-            msg=f"Expected device name + label. Got: {msgs}"
+            server_log_contains("Basin Occupancy Sensor", "Occupancy"),
+            msg=f"Expected device name + label. Got: {server_log_lines()}"
         )
 
     def test_unmonitored_device_produces_no_log(self):
@@ -370,7 +504,7 @@ class TestDeviceUpdatedOnState(unittest.TestCase):
         new  = MockDevice(999999999, "Some Unrelated Device", on_state=True)
         self.plugin.deviceUpdated(orig, new)
 
-        mock_indigo.server.log.assert_not_called()
+        self.assertEqual(server_log_messages(), [])
 
     def test_device_without_onstate_produces_no_error(self):
         """deviceUpdated with state='onState' but device lacking onState does not log
@@ -378,11 +512,12 @@ class TestDeviceUpdatedOnState(unittest.TestCase):
         they are equal, so nothing is logged (no error, no state log)."""
         # Manually inject a ThermostatDevice into device_monitor
         self.plugin.device_monitor[555003] = [{"state": "onState", "label": "TRV"}]
+        self.plugin._rebuild_monitor_index()
         trv = MockThermostatDevice(555003, "Living Room Door TRV")
         self.plugin.deviceUpdated(trv, trv)
 
-        self.plugin.logger.error.assert_not_called()
-        mock_indigo.server.log.assert_not_called()
+        self.assertEqual(self.plugin.logger.error.calls, [])
+        self.assertEqual(server_log_messages(), [])
 
 
 # ======================================
@@ -393,7 +528,6 @@ class TestDeviceUpdatedCustomStates(unittest.TestCase):
 
     def setUp(self):
         mock_indigo.server.log.reset_mock()
-        mock_indigo.devices = make_device_registry()
         self.plugin = make_plugin()
 
     def test_only_changed_state_is_logged(self):
@@ -404,10 +538,10 @@ class TestDeviceUpdatedCustomStates(unittest.TestCase):
                           states={"pirDetection": False, "presence": True})
         self.plugin.deviceUpdated(orig, new)
 
-        msgs = server_log_messages()
-        self.assertFalse(any("PIR" in m for m in msgs),
+        msgs = server_log_lines()
+        self.assertFalse(server_log_contains("PIR"),
             msg=f"PIR unchanged - should not log. Got: {msgs}")
-        self.assertTrue(any("mmWave Presence" in m and "ON" in m for m in msgs),
+        self.assertTrue(server_log_contains("mmWave Presence", "ON"),
             msg=f"presence changed - should log. Got: {msgs}")
 
     def test_both_states_logged_when_both_change(self):
@@ -418,11 +552,13 @@ class TestDeviceUpdatedCustomStates(unittest.TestCase):
                           states={"pirDetection": True,  "presence": True})
         self.plugin.deviceUpdated(orig, new)
 
-        msgs = server_log_messages()
+        msgs = server_log_lines()
         self.assertTrue(any("PIR" in m and m.endswith("ON") for m in msgs),
             msg=f"Expected PIR ON. Got: {msgs}")
         self.assertTrue(any("mmWave Presence" in m and m.endswith("ON") for m in msgs),
             msg=f"Expected mmWave Presence ON. Got: {msgs}")
+        self.assertEqual(len(server_log_messages()), 1,
+            msg="Both lines of one update should go out in a single log call")
 
     def test_custom_state_off_logs_off(self):
         """presence True -> False logs OFF."""
@@ -432,10 +568,70 @@ class TestDeviceUpdatedCustomStates(unittest.TestCase):
                           states={"pirDetection": False, "presence": False})
         self.plugin.deviceUpdated(orig, new)
 
-        msgs = server_log_messages()
+        msgs = server_log_lines()
         self.assertTrue(any("mmWave Presence" in m and m.endswith("OFF") for m in msgs),
             msg=f"Expected mmWave Presence OFF. Got: {msgs}")
 
+    def test_unmonitored_state_change_not_logged(self):
+        """A change to an unmonitored state (battery level) logs nothing."""
+        orig = MockDevice(1976004986, "Basin mmWave Sensor",
+                          states={"presence": True, "batteryLevel": 80})
+        new  = MockDevice(1976004986, "Basin mmWave Sensor",
+                          states={"presence": True, "batteryLevel": 79})
+        self.plugin.deviceUpdated(orig, new)
+
+        self.assertEqual(server_log_messages(), [])
+
+    def test_log_throttle_suppresses_repeated_state_text(self):
+        """With log_throttle set, a repeat of the last logged text is dropped."""
+        def update(old, new):
+            self.plugin.deviceUpdated(
+                MockDevice(1976004986, "Basin mmWave Sensor", states={"presence": old}),
+                MockDevice(1976004986, "Basin mmWave Sensor", states={"presence": new}),
+            )
+
+        self.plugin.log_throttle = 60.0
+        update(0, 1)   # -> ON, logged
+        update(1, 2)   # -> ON again within the window, dropped
+        update(2, 0)   # -> OFF, logged
+
+        msgs = server_log_lines()
+        self.assertEqual(len(msgs), 2, msg=f"Expected ON then OFF only. Got: {msgs}")
+        self.assertTrue(msgs[0].endswith("ON") and msgs[1].endswith("OFF"))
+
+    def test_on_value_off_value_match_string_states(self):
+        """Scalar on_value and list off_value are matched against string states."""
+        self.plugin.device_monitor[333444] = [{
+            "state": "presenceEvent", "label": "Presence",
+            "on_text": "ENTER", "off_text": "LEAVE",
+            "on_value": "enter", "off_value": ["leave", "away"],
+        }]
+        self.plugin._rebuild_monitor_index()
+        for old, new, expected in (("leave", "enter", "ENTER"),
+                                   ("enter", "away",  "LEAVE")):
+            mock_indigo.server.log.reset_mock()
+            self.plugin.deviceUpdated(
+                MockDevice(333444, "Hall FP1", states={"presenceEvent": old}),
+                MockDevice(333444, "Hall FP1", states={"presenceEvent": new}),
+            )
+            msgs = server_log_lines()
+            self.assertTrue(any(m.endswith(f"Presence {expected}") for m in msgs),
+                msg=f"Expected Presence {expected}. Got: {msgs}")
+
+    def test_value_matching_neither_is_not_logged(self):
+        """A new value matching neither on_value nor off_value logs nothing."""
+        self.plugin.device_monitor[333444] = [{
+            "state": "presenceEvent", "label": "Presence",
+            "on_value": "enter", "off_value": "leave",
+        }]
+        self.plugin._rebuild_monitor_index()
+        self.plugin.deviceUpdated(
+            MockDevice(333444, "Hall FP1", states={"presenceEvent": "enter"}),
+            MockDevice(333444, "Hall FP1", states={"presenceEvent": "approach"}),
+        )
+
+        self.assertEqual(server_log_messages(), [])
+
 
 # ======================================
 # TEST: DEVICE UPDATED - on_text / off_text
@@ -445,7 +641,6 @@ class TestDeviceUpdatedCustomText(unittest.TestCase):
 
     def setUp(self):
         mock_indigo.server.log.reset_mock()
-        mock_indigo.devices = make_device_registry()
         self.plugin = make_plugin()
 
     def test_contact_open_text(self):
@@ -454,7 +649,7 @@ class TestDeviceUpdatedCustomText(unittest.TestCase):
         new  = MockDevice(415253439, "Bathroom Door Contact", on_state=True)
         self.plugin.deviceUpdated(orig, new)
 
-        msgs = server_log_messages()
+        msgs = server_log_lines()
         self.assertTrue(any(m.endswith("OPEN") for m in msgs),
             msg=f"Expected message ending with OPEN. Got: {msgs}")
         self.assertFalse(any(m.endswith("ON") for m in msgs),
@@ -466,7 +661,7 @@ class TestDeviceUpdatedCustomText(unittest.TestCase):
         new  = MockDevice(415253439, "Bathroom Door Contact", on_state=False)
         self.plugin.deviceUpdated(orig, new)
 
-        msgs = server_log_messages()
+        msgs = server_log_lines()
         self.assertTrue(any(m.endswith("CLOSED") for m in msgs),
             msg=f"Expected message ending with CLOSED. Got: {msgs}")
         self.assertFalse(any(m.endswith("OFF") for m in msgs),
@@ -481,7 +676,6 @@ class TestDeviceUpdatedRename(unittest.TestCase):
 
     def setUp(self):
         mock_indigo.server.log.reset_mock()
-        mock_indigo.devices = make_device_registry()
         self.plugin = make_plugin()
 
     def test_rename_on_monitored_device_logs_both_names(self):
@@ -490,10 +684,9 @@ class TestDeviceUpdatedRename(unittest.TestCase):
         new  = MockDevice(812537401, "New Basin Name", on_state=False)
         self.plugin.deviceUpdated(orig, new)
 
-        msgs = server_log_messages()
         self.assertTrue(
-            any("Old Basin Name" in m and "New Basin Name" in m for m in msgs),
-            msg=f"Expected rename message with both names. Got: {msgs}"
+            server_log_contains("Old Basin Name", "New Basin Name"),
+            msg=f"Expected rename message with both names. Got: {server_log_lines()}"
         )
 
     def test_no_rename_log_when_name_unchanged(self):
@@ -502,7 +695,7 @@ class TestDeviceUpdatedRename(unittest.TestCase):
         new  = MockDevice(812537401, "Basin Occupancy Sensor", on_state=False)
         self.plugin.deviceUpdated(orig, new)
 
-        mock_indigo.server.log.assert_not_called()
+        self.assertEqual(server_log_messages(), [])
 
     def test_rename_on_unmonitored_device_not_logged(self):
         """Rename of an unmonitored device is silently ignored."""
@@ -510,7 +703,7 @@ class TestDeviceUpdatedRename(unittest.TestCase):
         new  = MockDevice(999999999, "Unrelated New Name", on_state=True)
         self.plugin.deviceUpdated(orig, new)
 
-        mock_indigo.server.log.assert_not_called()
+        self.assertEqual(server_log_messages(), [])
 
 
 # ======================================
@@ -529,24 +722,36 @@ class TestDeviceDeleted(unittest.TestCase):
         dev = MockDevice(812537401, "Basin Occupancy Sensor")
         self.plugin.deviceDeleted(dev)
 
-        self.plugin.logger.warning.assert_called()
-        warn_text = " ".join(str(c) for c in self.plugin.logger.warning.call_args_list)
-        self.assertIn("Basin Occupancy Sensor", warn_text)
+        self.assertTrue(logged(self.plugin.logger.warning, "Basin Occupancy Sensor"),
+            msg=f"Expected warning naming the device. Got: {self.plugin.logger.warning.calls}")
 
     def test_monitored_device_deleted_includes_id(self):
         """Warning for deleted device includes the device ID."""
         dev = MockDevice(812537401, "Basin Occupancy Sensor")
         self.plugin.deviceDeleted(dev)
 
-        warn_text = " ".join(str(c) for c in self.plugin.logger.warning.call_args_list)
-        self.assertIn("812537401", warn_text)
+        self.assertTrue(logged(self.plugin.logger.warning, "812537401"),
+            msg=f"Got: {self.plugin.logger.warning.calls}")
 
     def test_unmonitored_device_deleted_no_warning(self):
         """Deleting an unmonitored device produces no warning."""
         dev = MockDevice(999999999, "Irrelevant Device")
         self.plugin.deviceDeleted(dev)
 
-        self.plugin.logger.warning.assert_not_called()
+        self.assertEqual(self.plugin.logger.warning.calls, [])
+
+    def test_own_group_device_deleted_leaves_group_index(self):
+        """Deleting one of the plugin's damGroup devices drops it from the group index."""
+        dev = MockDevice(777001, "Downstairs Group", plugin_id=self.plugin.pluginId)
+        dev.deviceTypeId = "damGroup"
+        self.plugin.device_groups[dev.id] = {"name": dev.name, "members": {812537401}}
+        self.plugin._rebuild_group_index()
+
+        self.plugin.deviceDeleted(dev)
+
+        self.assertNotIn(777001, self.plugin.device_groups)
+        self.assertNotIn(812537401, self.plugin.group_members)
+        self.assertEqual(self.plugin.logger.warning.calls, [])
 
 
 # ======================================
@@ -558,23 +763,78 @@ class TestLogFormat(unittest.TestCase):
 
     def setUp(self):
         mock_indigo.server.log.reset_mock()
-        mock_indigo.devices = make_device_registry()
         self.plugin = make_plugin()
 
     def test_log_contains_millisecond_timestamp(self):
         """Log message starts with [HH:MM:SS.mmm] format."""
-        import re
         orig = MockDevice(812537401, "Basin Occupancy Sensor", on_state=False)
         new  = MockDevice(812537401, "Basin Occupancy Sensor", on_state=True)
         self.plugin.deviceUpdated(orig, new)
 
-        msgs = server_log_messages()
-        ts_pattern = re.compile(r"^\[\d{2}:\d{2}:\d{2}\.\d{3}\]")
+        msgs = server_log_lines()
         self.assertTrue(
-            any(ts_pattern.match(m) for m in msgs),
+            any(_TS_RE.match(m) for m in msgs),
             msg=f"Expected [HH:MM:SS.mmm] prefix. Got: {msgs}"
         )
 
+    def test_batched_lines_flushed_as_one_log_call(self):
+        """While the flusher runs, event lines are queued and sent in one call."""
+        self.plugin._log_batching = True
+        orig = MockDevice(1976004986, "Basin mmWave Sensor",
+                          states={"pirDetection": False, "presence": False})
+        new  = MockDevice(1976004986, "Basin mmWave Sensor",
+                          states={"pirDetection": True,  "presence": True})
+        self.plugin.deviceUpdated(orig, new)
+
+        self.assertEqual(server_log_messages(), [])
+
+        self.plugin._flush_log()
+        self.assertEqual(len(server_log_messages()), 1)
+        lines = server_log_messages()[0].split("\n")
+        self.assertEqual(len(lines), 2, msg=f"Expected PIR + presence lines. Got: {lines}")
+        self.assertFalse(self.plugin._log_buf)
+
+    def test_shutdown_flushes_lines_queued_after_last_drain(self):
+        """A line queued after the flusher's final drain still reaches the log at shutdown."""
+        self.plugin._log_batching = True
+        orig = MockDevice(812537401, "Basin Occupancy Sensor", on_state=False)
+        new  = MockDevice(812537401, "Basin Occupancy Sensor", on_state=True)
+        self.plugin.deviceUpdated(orig, new)
+        self.plugin._log_batching = False  # flusher exited without seeing it
+
+        self.plugin.shutdown()
+        self.assertTrue(server_log_contains("Basin Occupancy Sensor"),
+            msg=f"Queued line lost at shutdown. Got: {server_log_lines()}")
+        self.assertFalse(self.plugin._log_buf)
+
+    def test_line_queued_as_flusher_stops_is_sent(self):
+        """If the flusher stops between _server_log's check and its append, the line is sent."""
+        plugin = self.plugin
+
+        class _StopsFlusherBuf(collections.deque):
+            def append(self, item):
+                super().append(item)
+                plugin._log_batching = False  # final drain already ran
+
+        plugin._log_buf      = _StopsFlusherBuf()
+        plugin._log_batching = True
+        plugin._server_log("late line")
+
+        self.assertEqual(server_log_messages(), ["late line"])
+        self.assertFalse(plugin._log_buf)
+
+    def test_deletion_warning_flushes_queued_lines_first(self):
+        """Queued state lines go out before a deletion warning, keeping the log in order."""
+        self.plugin._log_batching = True
+        orig = MockDevice(812537401, "Basin Occupancy Sensor", on_state=False)
+        new  = MockDevice(812537401, "Basin Occupancy Sensor", on_state=True)
+        self.plugin.deviceUpdated(orig, new)
+
+        self.plugin.deviceDeleted(new)
+        self.assertEqual(len(server_log_messages()), 1)
+        self.assertFalse(self.plugin._log_buf)
+        self.assertTrue(logged(self.plugin.logger.warning, "812537401"))
+
 
 # ======================================
 # TEST: VARIABLE STARTUP VALIDATION
@@ -592,7 +852,7 @@ class TestVariableStartupValidation(unittest.TestCase):
         plugin = make_plugin()
         plugin.startup()
 
-        info_calls = [str(c) for c in plugin.logger.info.call_args_list]
+        info_calls = logger_lines(plugin.logger.info)
         ok_count   = sum(1 for c in info_calls if "[OK]" in c)
 
         # ok_count covers both devices and variables
@@ -605,8 +865,8 @@ class TestVariableStartupValidation(unittest.TestCase):
         plugin = make_plugin()
         plugin.startup()
 
-        info_text = " ".join(str(c) for c in plugin.logger.info.call_args_list)
-        self.assertIn("All monitored variables validated OK", info_text)
+        self.assertTrue(logged(plugin.logger.info, "All monitored variables validated OK"),
+            msg=f"Got: {plugin.logger.info.calls}")
 
     def test_missing_variable_logs_bang(self):
         """startup() logs [!] for a missing variable ID."""
@@ -615,9 +875,8 @@ class TestVariableStartupValidation(unittest.TestCase):
         plugin = make_plugin()
         plugin.startup()
 
-        warn_calls = [str(c) for c in plugin.logger.warning.call_args_list]
-        self.assertTrue(any("[!]" in c and "241032502" in c for c in warn_calls),
-            msg=f"Expected [!] for missing variable. Got: {warn_calls}")
+        self.assertTrue(logged(plugin.logger.warning, "[!]", "241032502"),
+            msg=f"Expected [!] for missing variable. Got: {plugin.logger.warning.calls}")
 
     def test_variable_subscribetochanges_called(self):
         """startup() calls indigo.variables.subscribeToChanges()."""
@@ -649,9 +908,8 @@ class TestVariableUpdated(unittest.TestCase):
         new  = MockVariable(241032502, "Lux_Level", "520")
         self.plugin.variableUpdated(orig, new)
 
-        msgs = server_log_messages()
-        self.assertTrue(any("450" in m and "520" in m and "->" in m for m in msgs),
-            msg=f"Expected '450 -> 520' in log. Got: {msgs}")
+        self.assertTrue(server_log_contains("450", "520", "->"),
+            msg=f"Expected '450 -> 520' in log. Got: {server_log_lines()}")
 
     def test_custom_label_used_in_log(self):
         """Label from variable_monitor config appears in log instead of raw variable name."""
@@ -659,9 +917,8 @@ class TestVariableUpdated(unittest.TestCase):
         new  = MockVariable(241032502, "Lux_Level", "200")
         self.plugin.variableUpdated(orig, new)
 
-        msgs = server_log_messages()
-        self.assertTrue(any("Lux Level" in m for m in msgs),
-            msg=f"Expected label 'Lux Level' in log. Got: {msgs}")
+        self.assertTrue(server_log_contains("Lux Level"),
+            msg=f"Expected label 'Lux Level' in log. Got: {server_log_lines()}")
 
     def test_no_change_no_log(self):
         """Unchanged variable value produces no log output."""
@@ -669,7 +926,7 @@ class TestVariableUpdated(unittest.TestCase):
         new  = MockVariable(241032502, "Lux_Level", "450")
         self.plugin.variableUpdated(orig, new)
 
-        mock_indigo.server.log.assert_not_called()
+        self.assertEqual(server_log_messages(), [])
 
     def test_unmonitored_variable_ignored(self):
         """Variable not in variable_monitor is silently ignored."""
@@ -677,7 +934,7 @@ class TestVariableUpdated(unittest.TestCase):
         new  = MockVariable(999999999, "Some_Other_Var", "b")
         self.plugin.variableUpdated(orig, new)
 
-        mock_indigo.server.log.assert_not_called()
+        self.assertEqual(server_log_messages(), [])
 
     def test_rename_detection_logged(self):
         """Variable rename on a monitored variable is logged."""
@@ -685,9 +942,8 @@ class TestVariableUpdated(unittest.TestCase):
         new  = MockVariable(241032502, "New_Lux_Name", "100")
         self.plugin.variableUpdated(orig, new)
 
-        msgs = server_log_messages()
-        self.assertTrue(any("Old_Lux_Name" in m and "New_Lux_Name" in m for m in msgs),
-            msg=f"Expected rename log. Got: {msgs}")
+        self.assertTrue(server_log_contains("Old_Lux_Name", "New_Lux_Name"),
+            msg=f"Expected rename log. Got: {server_log_lines()}")
 
 
 # ======================================
@@ -707,17 +963,15 @@ class TestVariableDeleted(unittest.TestCase):
         var = MockVariable(241032502, "Lux_Level", "0")
         self.plugin.variableDeleted(var)
 
-        self.plugin.logger.warning.assert_called()
-        warn_text = " ".join(str(c) for c in self.plugin.logger.warning.call_args_list)
-        self.assertIn("Lux_Level", warn_text)
-        self.assertIn("241032502", warn_text)
+        self.assertTrue(logged(self.plugin.logger.warning, "Lux_Level", "241032502"),
+            msg=f"Expected one warning with name and ID. Got: {self.plugin.logger.warning.calls}")
 
     def test_unmonitored_variable_deleted_silent(self):
         """Deleting an unmonitored variable produces no warning."""
         var = MockVariable(999999999, "Irrelevant_Var", "0")
         self.plugin.variableDeleted(var)
 
-        self.plugin.logger.warning.assert_not_called()
+        self.assertEqual(self.plugin.logger.warning.calls, [])
 
 
 # ======================================
@@ -731,21 +985,13 @@ class TestConfigLoading(unittest.TestCase):
         mock_indigo.server.log.reset_mock()
         mock_indigo.devices   = make_device_registry()
         mock_indigo.variables = make_variable_registry()
-        self._tmp_files = []
-
-    def tearDown(self):
-        for path in self._tmp_files:
-            try:
-                os.unlink(path)
-            except Exception:
-                pass
 
     def _write_config(self, content):
         """Write content to a temp file and return the path."""
         fd, path = tempfile.mkstemp(suffix=".json", prefix="sm_test_")
         with os.fdopen(fd, "w", encoding="utf-8") as f:
             f.write(content)
-        self._tmp_files.append(path)
+        self.addCleanup(os.unlink, path)
         return path
 
     # --- Fallback behaviour ---
@@ -772,105 +1018,74 @@ class TestConfigLoading(unittest.TestCase):
         self.assertNotIn(999999999, DEVICE_MONITOR,
             msg="Mutating device_monitor should not alter module-level DEVICE_MONITOR")
 
-    # --- Device loading ---
+    # --- Parsing: sections, comment lines, trailing commas ---
 
-    def test_devices_loaded_from_json(self):
-        """Devices section of JSON is loaded into self.device_monitor."""
-        config = '''{
+    # (case, config text, {device_id: label}, {variable_id: label}, absent device IDs)
+    _PARSE_CASES = (
+        ("devices section", '''{
   "devices": [
     {"id": 111111, "state": "onState", "label": "Test Device"}
   ],
   "variables": []
-}'''
-        path   = self._write_config(config)
-        plugin = make_plugin()
-        plugin._load_config(path)
-
-        self.assertIn(111111, plugin.device_monitor,
-            msg="Device ID 111111 should be in device_monitor")
-        self.assertEqual(plugin.device_monitor[111111][0]["label"], "Test Device")
-
-    def test_variables_loaded_from_json(self):
-        """Variables section of JSON is loaded into self.variable_monitor."""
-        config = '''{
+}''', {111111: "Test Device"}, {}, ()),
+        ("variables section", '''{
   "devices": [],
   "variables": [
     {"id": 222222, "label": "Test Var"}
   ]
-}'''
-        path   = self._write_config(config)
-        plugin = make_plugin()
-        plugin._load_config(path)
-
-        self.assertIn(222222, plugin.variable_monitor,
-            msg="Variable ID 222222 should be in variable_monitor")
-        self.assertEqual(plugin.variable_monitor[222222]["label"], "Test Var")
-
-    # --- Comment stripping ---
-
-    def test_comment_lines_ignored(self):
-        """Lines starting with # are stripped before JSON parsing."""
-        config = '''{
+}''', {}, {222222: "Test Var"}, ()),
+        ("comment line", '''{
   "devices": [
     {"id": 111111, "state": "onState", "label": "Active Device"},
 # {"id": 222222, "state": "onState", "label": "Disabled Device"}
   ],
   "variables": []
-}'''
-        path   = self._write_config(config)
-        plugin = make_plugin()
-        plugin._load_config(path)
-
-        self.assertIn(111111, plugin.device_monitor,
-            msg="Active device should be present")
-        self.assertNotIn(222222, plugin.device_monitor,
-            msg="Commented-out device should be absent")
-
-    def test_indented_comment_lines_ignored(self):
-        """Lines with leading whitespace before # are also treated as comments."""
-        config = '''{
+}''', {111111: "Active Device"}, {}, (222222,)),
+        ("indented comment line", '''{
   "devices": [
     {"id": 111111, "state": "onState", "label": "Active"},
     # {"id": 333333, "state": "onState", "label": "Indented Comment"}
   ],
   "variables": []
-}'''
-        path   = self._write_config(config)
-        plugin = make_plugin()
-        plugin._load_config(path)
-
-        self.assertIn(111111, plugin.device_monitor)
-        self.assertNotIn(333333, plugin.device_monitor)
-
-    # --- Trailing comma handling ---
-
-    def test_trailing_comma_in_devices_handled(self):
-        """Trailing comma after last device entry does not cause parse error."""
-        config = '''{
+}''', {111111: "Active"}, {}, (333333,)),
+        ("commented entry between active entries", '''{
+  "devices": [
+    {"id": 111111, "state": "onState", "label": "First"},
+    # {"id": 222222, "state": "onState", "label": "Disabled"},
+    {"id": 333333, "state": "onState", "label": "Third"}
+  ],
+  "variables": []
+}''', {111111: "First", 333333: "Third"}, {}, (222222,)),
+        ("trailing comma in devices", '''{
   "devices": [
     {"id": 111111, "state": "onState", "label": "Test"},
   ],
   "variables": []
-}'''
-        path   = self._write_config(config)
-        plugin = make_plugin()
-        plugin._load_config(path)  # Should not raise
-
-        self.assertIn(111111, plugin.device_monitor)
-
-    def test_trailing_comma_in_variables_handled(self):
-        """Trailing comma after last variable entry does not cause parse error."""
-        config = '''{
+}''', {111111: "Test"}, {}, ()),
+        ("trailing comma in variables", '''{
   "devices": [],
   "variables": [
     {"id": 222222, "label": "Var"},
   ]
-}'''
-        path   = self._write_config(config)
-        plugin = make_plugin()
-        plugin._load_config(path)  # Should not raise
+}''', {}, {222222: "Var"}, ()),
+    )
 
-        self.assertIn(222222, plugin.variable_monitor)
+    def test_config_text_parsed(self):
+        """Devices/variables load; # lines (indented too) and trailing commas are tolerated."""
+        plugin = make_plugin()
+        for case, config, devices, variables, absent in self._PARSE_CASES:
+            with self.subTest(case=case):
+                plugin._load_config(self._write_config(config))  # Should not raise
+
+                for dev_id, label in devices.items():
+                    self.assertIn(dev_id, plugin.device_monitor)
+                    self.assertEqual(plugin.device_monitor[dev_id][0]["label"], label)
+                for var_id, label in variables.items():
+                    self.assertIn(var_id, plugin.variable_monitor)
+                    self.assertEqual(plugin.variable_monitor[var_id]["label"], label)
+                for dev_id in absent:
+                    self.assertNotIn(dev_id, plugin.device_monitor,
+                        msg="Commented-out device should be absent")
 
     # --- Multi-state devices ---
 
@@ -883,9 +1098,8 @@ class TestConfigLoading(unittest.TestCase):
   ],
   "variables": []
 }'''
-        path   = self._write_config(config)
         plugin = make_plugin()
-        plugin._load_config(path)
+        plugin._load_config(self._write_config(config))
 
         self.assertIn(111111, plugin.device_monitor)
         self.assertEqual(len(plugin.device_monitor[111111]), 2,
@@ -905,9 +1119,8 @@ class TestConfigLoading(unittest.TestCase):
   ],
   "variables": []
 }'''
-        path   = self._write_config(config)
         plugin = make_plugin()
-        plugin._load_config(path)
+        plugin._load_config(self._write_config(config))
 
         cfg = plugin.device_monitor[111111][0]
         self.assertEqual(cfg.get("on_text"),  "OPEN")
@@ -923,9 +1136,8 @@ class TestConfigLoading(unittest.TestCase):
   ],
   "variables": []
 }'''
-        path   = self._write_config(config)
         plugin = make_plugin()
-        plugin._load_config(path)
+        plugin._load_config(self._write_config(config))
 
         label = plugin.device_monitor[111111][0]["label"]
         self.assertEqual(label, "My Sensor Name",
@@ -933,53 +1145,71 @@ class TestConfigLoading(unittest.TestCase):
 
     # --- Integration: loaded config works in callbacks ---
 
-    def test_json_loaded_config_works_in_deviceupdated(self):
-        """deviceUpdated() correctly uses config loaded from JSON file."""
+    def test_json_loaded_config_works_in_callbacks(self):
+        """deviceUpdated() and variableUpdated() use labels from one loaded JSON config."""
         config = '''{
   "devices": [
     {"id": 333333, "state": "onState", "label": "JSON Label"}
   ],
-  "variables": []
-}'''
-        path   = self._write_config(config)
-        plugin = make_plugin()
-        plugin._load_config(path)
-
-        mock_indigo.server.log.reset_mock()
-        orig = MockDevice(333333, "JSON Test Device", on_state=False)
-        new  = MockDevice(333333, "JSON Test Device", on_state=True)
-        plugin.deviceUpdated(orig, new)
-
-        msgs = server_log_messages()
-        self.assertTrue(
-            any("JSON Test Device" in m and "JSON Label" in m for m in msgs),
-            msg=f"Expected JSON-configured label in log. Got: {msgs}"
-        )
-
-    def test_json_loaded_config_works_in_variableupdated(self):
-        """variableUpdated() correctly uses config loaded from JSON file."""
-        config = '''{
-  "devices": [],
   "variables": [
     {"id": 444444, "label": "JSON Var Label"}
   ]
 }'''
-        path   = self._write_config(config)
         plugin = make_plugin()
-        plugin._load_config(path)
+        plugin._load_config(self._write_config(config))
+
+        with self.subTest(callback="deviceUpdated"):
+            mock_indigo.server.log.reset_mock()
+            orig = MockDevice(333333, "JSON Test Device", on_state=False)
+            new  = MockDevice(333333, "JSON Test Device", on_state=True)
+            plugin.deviceUpdated(orig, new)
+
+            self.assertTrue(
+                server_log_contains("JSON Test Device", "JSON Label"),
+                msg=f"Expected JSON-configured label in log. Got: {server_log_lines()}"
+            )
+
+        with self.subTest(callback="variableUpdated"):
+            mock_indigo.server.log.reset_mock()
+            orig = MockVariable(444444, "some_var", "10")
+            new  = MockVariable(444444, "some_var", "20")
+            plugin.variableUpdated(orig, new)
+
+            self.assertTrue(
+                server_log_contains("JSON Var Label", "10", "20"),
+                msg=f"Expected JSON-configured variable label in log. Got: {server_log_lines()}"
+            )
 
-        mock_indigo.server.log.reset_mock()
-        orig = MockVariable(444444, "some_var", "10")
-        new  = MockVariable(444444, "some_var", "20")
-        plugin.variableUpdated(orig, new)
+    # --- Error resilience ---
 
-        msgs = server_log_messages()
-        self.assertTrue(
-            any("JSON Var Label" in m and "10" in m and "20" in m for m in msgs),
-            msg=f"Expected JSON-configured variable label in log. Got: {msgs}"
+    def test_non_string_state_does_not_break_load(self):
+        """A "state": null entry is indexed as-is instead of failing the load."""
+        path   = self._write_config(
+            '{"devices": [{"id": 111111, "state": null, "label": "Test"},'
+            ' {"id": 333333, "state": "onState", "label": "Other"}]}'
         )
+        plugin = make_plugin()
+        plugin._load_config(path)
 
-    # --- Error resilience ---
+        self.assertIsNone(plugin._monitor[111111][0][0])
+        self.assertIn(333333, plugin._monitor)
+
+    def test_invalid_log_throttle_disables_throttle(self):
+        """A bad log_throttle_ms warns and turns the throttle off; the devices still load."""
+        for bad in ('"500ms"', "null"):
+            with self.subTest(log_throttle_ms=bad):
+                path   = self._write_config(
+                    '{"devices": [{"id": 111111, "state": "onState", "label": "Test"}], '
+                    '"log_throttle_ms": %s}' % bad
+                )
+                plugin = make_plugin()
+                plugin._load_config(path)
+
+                self.assertEqual(plugin.log_throttle, 0.0)
+                self.assertIn(111111, plugin._monitor,
+                    msg="New config entries should be indexed despite the bad throttle")
+                self.assertTrue(logged(plugin.logger.warning, "log_throttle_ms"),
+                    msg=f"Expected a log_throttle_ms warning. Got: {plugin.logger.warning.calls}")
 
     def test_invalid_json_falls_back_to_defaults(self):
         """Malformed JSON causes fallback to DEVICE_MONITOR / VARIABLE_MONITOR."""
@@ -1083,6 +1313,18 @@ class TestDiscoveryFilter(unittest.TestCase):
         states = {}
         self.assertTrue(self.plugin._disc_is_contact(dev, states))
 
+    def test_disc_cached_reclassifies_after_device_updated(self):
+        """_disc_cached reuses its entry until deviceUpdated drops it."""
+        dev = MockDevice(561, "Front Door Sensor", on_state=False)
+        self.assertTrue(self.plugin._disc_cached(dev).is_contact)
+
+        dev.name = "Front Door Temperature"
+        self.assertTrue(self.plugin._disc_cached(dev).is_contact,
+                        msg="Unchanged device should be served from the cache")
+
+        self.plugin.deviceUpdated(dev, dev)
+        self.assertFalse(self.plugin._disc_cached(dev).is_contact)
+
 
 # ======================================
 # TEST: DISCOVERY FILTER (_disc_is_motion / _disc_motion_states)
@@ -1148,12 +1390,11 @@ class TestDiscoveryMotion(unittest.TestCase):
         self.assertFalse(self.plugin._disc_is_motion(dev, states))
 
     def test_disc_motion_states_returns_found_motion_states(self):
-        """_disc_motion_states returns all matching motion state names, sorted."""
+        """_disc_motion_states returns the single highest-priority motion state."""
         states = {"pirDetection": False, "presence": True, "battery": 80}
         result = self.plugin._disc_motion_states(states)
-        self.assertIn("pirDetection", result)
-        self.assertIn("presence",     result)
-        self.assertNotIn("battery",   result)
+        self.assertEqual(result, ["presence"],
+            msg="presence outranks pirDetection in _MOTION_STATE_PRIORITY")
 
     def test_disc_motion_states_fallback_to_onstate(self):
         """_disc_motion_states returns ['onState'] when no known motion states found."""
@@ -1401,8 +1642,7 @@ class TestMenuCallbacks(unittest.TestCase):
         plugin = make_plugin()
         plugin.menuReloadConfig()
 
-        info_text = " ".join(str(c) for c in plugin.logger.info.call_args_list)
-        self.assertIn("->", info_text,
+        self.assertTrue(logged(plugin.logger.info, "->"),
             msg="Reload log should contain 'old -> new' counts")
 
     def test_menu_reload_config_reruns_validation(self):
@@ -1411,10 +1651,32 @@ class TestMenuCallbacks(unittest.TestCase):
         plugin.logger.info.reset_mock()
         plugin.menuReloadConfig()
 
-        info_text = " ".join(str(c) for c in plugin.logger.info.call_args_list)
-        self.assertIn("[OK]", info_text,
+        self.assertTrue(logged(plugin.logger.info, "[OK]"),
             msg="menuReloadConfig should re-run device validation")
 
+    def test_menu_reload_config_skips_unchanged_file(self):
+        """menuReloadConfig does not re-parse a config file whose mtime is unchanged."""
+        fd, path = tempfile.mkstemp(suffix=".json", prefix="sm_test_")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write('{"devices": [{"id": 111111, "label": "Test"}], "variables": []}')
+
+        orig_config = _mod.CONFIG_PATH
+        _mod.CONFIG_PATH = path
+        try:
+            plugin = make_plugin()
+            plugin.device_monitor[999999999] = [{"state": "onState", "label": "Ghost"}]
+            plugin.menuReloadConfig()
+            self.assertIn(999999999, plugin.device_monitor,
+                msg="Unchanged file should not have been re-parsed")
+
+            os.utime(path, (0, 0))
+            plugin.menuReloadConfig()
+            self.assertNotIn(999999999, plugin.device_monitor,
+                msg="Modified file should have been re-parsed")
+        finally:
+            _mod.CONFIG_PATH = orig_config
+            os.unlink(path)
+
     # --- menuFindContactSensors ---
 
     def test_menu_find_contact_sensors_logs_header(self):
@@ -1422,8 +1684,7 @@ class TestMenuCallbacks(unittest.TestCase):
         plugin = make_plugin()
         plugin.menuFindContactSensors()
 
-        info_text = " ".join(str(c) for c in plugin.logger.info.call_args_list)
-        self.assertIn("Contact", info_text,
+        self.assertTrue(logged(plugin.logger.info, "Contact"),
             msg="Discovery header should mention 'Contact'")
 
     def test_menu_find_contact_sensors_logs_candidate(self):
@@ -1431,8 +1692,7 @@ class TestMenuCallbacks(unittest.TestCase):
         plugin = make_plugin()
         plugin.menuFindContactSensors()
 
-        info_text = " ".join(str(c) for c in plugin.logger.info.call_args_list)
-        self.assertIn("Front Door Sensor", info_text,
+        self.assertTrue(logged(plugin.logger.info, "Front Door Sensor"),
             msg="Device with 'door' in name should be logged as a candidate")
 
     def test_menu_find_contact_sensors_finds_motion_sensor(self):
@@ -1440,8 +1700,7 @@ class TestMenuCallbacks(unittest.TestCase):
         plugin = make_plugin()
         plugin.menuFindContactSensors()
 
-        info_text = " ".join(str(c) for c in plugin.logger.info.call_args_list)
-        self.assertIn("Lounge Motion Sensor", info_text,
+        self.assertTrue(logged(plugin.logger.info, "Lounge Motion Sensor"),
             msg="Motion sensor 'Lounge Motion Sensor' should appear as a motion candidate")
 
     def test_menu_find_contact_sensors_skips_non_sensor(self):
@@ -1449,8 +1708,7 @@ class TestMenuCallbacks(unittest.TestCase):
         plugin = make_plugin()
         plugin.menuFindContactSensors()
 
-        info_text = " ".join(str(c) for c in plugin.logger.info.call_args_list)
-        self.assertNotIn("Kitchen Light Switch", info_text,
+        self.assertFalse(logged(plugin.logger.info, "Kitchen Light Switch"),
             msg="'Kitchen Light Switch' has no sensor keywords - should not appear")
 
     def test_menu_find_contact_sensors_skips_thermostat_with_door_keyword(self):
@@ -1458,19 +1716,30 @@ class TestMenuCallbacks(unittest.TestCase):
         plugin = make_plugin()
         plugin.menuFindContactSensors()
 
-        info_text = " ".join(str(c) for c in plugin.logger.info.call_args_list)
-        self.assertNotIn("Living Room Door TRV", info_text,
+        self.assertFalse(logged(plugin.logger.info, "Living Room Door TRV"),
             msg="ThermostatDevice 'Living Room Door TRV' must not appear - no onState")
 
     # --- menuDiscoverDevices ---
 
     def test_menu_discover_devices_logs_summary(self):
         """menuDiscoverDevices logs a 'Discovery complete' summary line."""
-        plugin = make_plugin()
-        plugin.menuDiscoverDevices()
+        import shutil
+        tmpdir = tempfile.mkdtemp()
+
+        orig_disc   = _mod.DISCOVERY_OUTPUT_PATH
+        orig_config = _mod.CONFIG_PATH
+        _mod.DISCOVERY_OUTPUT_PATH = os.path.join(tmpdir, "device_discovery.json")
+        _mod.CONFIG_PATH           = os.path.join(tmpdir, "sensor_monitor_config.json")
 
-        info_text = " ".join(str(c) for c in plugin.logger.info.call_args_list)
-        self.assertIn("Discovery complete", info_text,
+        try:
+            plugin = make_plugin()
+            plugin.menuDiscoverDevices()
+        finally:
+            _mod.DISCOVERY_OUTPUT_PATH = orig_disc
+            _mod.CONFIG_PATH           = orig_config
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        self.assertTrue(logged(plugin.logger.info, "Discovery complete"),
             msg="menuDiscoverDevices should log a summary line")
 
     def test_menu_discover_devices_writes_config_file(self):
@@ -1498,6 +1767,36 @@ class TestMenuCallbacks(unittest.TestCase):
             _mod.CONFIG_PATH           = orig_config
             shutil.rmtree(tmpdir, ignore_errors=True)
 
+    def test_menu_discover_devices_failed_write_leaves_no_tmp_file(self):
+        """A config write that fails part-way logs an error and removes its .tmp file."""
+        import shutil
+        tmpdir = tempfile.mkdtemp()
+        config_path = os.path.join(tmpdir, "sensor_monitor_config.json")
+
+        orig_disc   = _mod.DISCOVERY_OUTPUT_PATH
+        orig_config = _mod.CONFIG_PATH
+        _mod.DISCOVERY_OUTPUT_PATH = os.path.join(tmpdir, "device_discovery.json")
+        _mod.CONFIG_PATH           = config_path
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("simulated write failure")
+
+        try:
+            plugin = make_plugin()
+            plugin._disc_config_entry = fail
+            plugin.menuDiscoverDevices()
+
+            self.assertFalse(os.path.exists(config_path + ".tmp"),
+                msg="Half-written .tmp file should be removed")
+            self.assertFalse(os.path.exists(config_path),
+                msg="A failed write must not replace the config")
+            self.assertTrue(logged(plugin.logger.error, "ERROR saving", "simulated write failure"),
+                msg=f"Expected a save error. Got: {plugin.logger.error.calls}")
+        finally:
+            _mod.DISCOVERY_OUTPUT_PATH = orig_disc
+            _mod.CONFIG_PATH           = orig_config
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
     def test_menu_discover_devices_config_contains_contact_candidate(self):
         """The generated config file includes the contact sensor candidate as an active entry."""
         import shutil